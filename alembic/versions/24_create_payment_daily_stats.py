@@ -0,0 +1,54 @@
+"""create payment_daily_stats rollup table
+
+Revision ID: 24_create_payment_daily_stats
+Revises: 5e6b6cc47c3f
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '24_create_payment_daily_stats'
+down_revision = '5e6b6cc47c3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_daily_stats',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('payment_type', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('amount_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('date', 'provider', 'payment_type'),
+    )
+
+    # Backfill from existing payments. Enum columns may hold member names or values;
+    # the rollup stores lower-case values.
+    op.execute(
+        """
+        INSERT INTO payment_daily_stats
+            (date, provider, payment_type, count, completed_count, failed_count, amount_sum)
+        SELECT
+            CAST(created_at AS DATE),
+            lower(CAST(payment_method AS TEXT)),
+            lower(CAST(payment_type AS TEXT)),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE upper(CAST(status AS TEXT)) = 'COMPLETED'),
+            COUNT(*) FILTER (WHERE upper(CAST(status AS TEXT)) = 'FAILED'),
+            COALESCE(SUM(amount) FILTER (WHERE upper(CAST(status AS TEXT)) = 'COMPLETED'), 0)
+        FROM payments
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('payment_daily_stats')
@@ -0,0 +1,44 @@
+"""store payment amounts as NUMERIC(18, 2)
+
+Revision ID: 25_payment_amounts_numeric
+Revises: 24_create_payment_daily_stats
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '25_payment_amounts_numeric'
+down_revision = '24_create_payment_daily_stats'
+branch_labels = None
+depends_on = None
+
+AMOUNT_COLUMNS = [
+    ('payments', 'amount'),
+    ('payment_refunds', 'amount'),
+    ('withdrawal_requests', 'amount'),
+    ('payment_daily_stats', 'amount_sum'),
+]
+
+
+def upgrade() -> None:
+    for table, column in AMOUNT_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.Float(),
+            type_=sa.Numeric(18, 2),
+            existing_nullable=False,
+            postgresql_using=f'round({column}::numeric, 2)',
+        )
+
+
+def downgrade() -> None:
+    for table, column in reversed(AMOUNT_COLUMNS):
+        op.alter_column(
+            table, column,
+            existing_type=sa.Numeric(18, 2),
+            type_=sa.Float(),
+            existing_nullable=False,
+        )
@@ -0,0 +1,128 @@
+"""partition payment_webhooks by month
+
+Revision ID: 26_partition_payment_webhooks
+Revises: 25_payment_amounts_numeric
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '26_partition_payment_webhooks'
+down_revision = '25_payment_amounts_numeric'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE payment_webhooks RENAME TO payment_webhooks_legacy")
+    op.execute("ALTER SEQUENCE IF EXISTS payment_webhooks_id_seq RENAME TO payment_webhooks_legacy_id_seq")
+
+    # The partition key has to be part of the primary key, so created_at becomes
+    # NOT NULL and joins id in it. `processed` follows the ORM model (integer flag).
+    op.execute(
+        """
+        CREATE TABLE payment_webhooks (
+            id SERIAL NOT NULL,
+            provider_name VARCHAR NOT NULL,
+            event_type VARCHAR NOT NULL,
+            payload JSON NOT NULL,
+            signature VARCHAR,
+            processed INTEGER NOT NULL DEFAULT 0,
+            processed_at TIMESTAMP WITH TIME ZONE,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    # Catch-all so an insert never fails if the nightly job falls behind
+    op.execute("CREATE TABLE payment_webhooks_default PARTITION OF payment_webhooks DEFAULT")
+
+    # One partition per month from the oldest stored webhook through next month
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            month_start date;
+        BEGIN
+            FOR month_start IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE(
+                        (SELECT min(created_at) FROM payment_webhooks_legacy), now()
+                    )),
+                    date_trunc('month', now()) + interval '1 month',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF payment_webhooks FOR VALUES FROM (%L) TO (%L)',
+                    'payment_webhooks_p' || to_char(month_start, 'YYYYMM'),
+                    month_start,
+                    (month_start + interval '1 month')::date
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO payment_webhooks
+            (id, provider_name, event_type, payload, signature, processed,
+             processed_at, error_message, created_at)
+        SELECT id, provider_name, event_type, payload, signature,
+               COALESCE(CAST(processed AS INTEGER), 0),
+               processed_at, error_message, COALESCE(created_at, processed_at, now())
+        FROM payment_webhooks_legacy
+        """
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('payment_webhooks', 'id'), "
+        "COALESCE((SELECT max(id) FROM payment_webhooks), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE payment_webhooks_legacy")
+
+    # Indexes on the parent cascade to every partition
+    op.create_index('ix_payment_webhooks_provider_name', 'payment_webhooks', ['provider_name'])
+    op.create_index('ix_payment_webhooks_processed', 'payment_webhooks', ['processed'])
+    op.create_index('ix_payment_webhooks_created_at', 'payment_webhooks', ['created_at'])
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE payment_webhooks RENAME TO payment_webhooks_partitioned")
+    op.execute(
+        """
+        CREATE TABLE payment_webhooks (
+            id SERIAL PRIMARY KEY,
+            provider_name VARCHAR NOT NULL,
+            event_type VARCHAR NOT NULL,
+            payload JSON NOT NULL,
+            signature VARCHAR,
+            processed INTEGER DEFAULT 0,
+            processed_at TIMESTAMP WITH TIME ZONE,
+            error_message TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO payment_webhooks
+            (id, provider_name, event_type, payload, signature, processed,
+             processed_at, error_message, created_at)
+        SELECT id, provider_name, event_type, payload, signature, processed,
+               processed_at, error_message, created_at
+        FROM payment_webhooks_partitioned
+        """
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('payment_webhooks', 'id'), "
+        "COALESCE((SELECT max(id) FROM payment_webhooks), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE payment_webhooks_partitioned CASCADE")
+    op.create_index('ix_payment_webhooks_provider_name', 'payment_webhooks', ['provider_name'])
+    op.create_index('ix_payment_webhooks_processed', 'payment_webhooks', ['processed'])
+    op.create_index('ix_payment_webhooks_created_at', 'payment_webhooks', ['created_at'])
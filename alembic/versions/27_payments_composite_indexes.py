@@ -0,0 +1,42 @@
+"""add composite and partial indexes on payments
+
+Revision ID: 27_payments_composite_indexes
+Revises: 26_partition_payment_webhooks
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '27_payments_composite_indexes'
+down_revision = '26_partition_payment_webhooks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_user_status_created', 'payments',
+            ['user_id', 'status', 'created_at'],
+            postgresql_using='btree', postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_payments_provider_txn', 'payments', ['provider_transaction_id'],
+            postgresql_using='btree', postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_payments_pending', 'payments', ['created_at'],
+            postgresql_using='btree', postgresql_concurrently=True, if_not_exists=True,
+            postgresql_where=sa.text("status = 'PENDING'")
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_payments_pending', table_name='payments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_payments_provider_txn', table_name='payments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_payments_user_status_created', table_name='payments', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,32 @@
+"""add covering (user_id, created_at) index for payment statistics
+
+Revision ID: 28_payments_user_created_stats
+Revises: 27_payments_composite_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '28_payments_user_created_stats'
+down_revision = '27_payments_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_user_created_stats', 'payments', ['user_id', 'created_at'],
+            postgresql_include=['payment_method', 'status', 'amount'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_payments_user_created_stats', table_name='payments',
+            postgresql_concurrently=True, if_exists=True
+        )
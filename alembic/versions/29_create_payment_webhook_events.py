@@ -0,0 +1,31 @@
+"""create payment_webhook_events idempotency table
+
+Revision ID: 29_create_payment_webhook_events
+Revises: 28_payments_user_created_stats
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29_create_payment_webhook_events'
+down_revision = '28_payments_user_created_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_webhook_events',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('external_event_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.UniqueConstraint('provider', 'external_event_id', name='uq_payment_webhook_events_provider_event'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('payment_webhook_events')
@@ -0,0 +1,44 @@
+"""replace the payment statistics index with (user_id, created_at DESC, status)
+
+Revision ID: 30_payments_user_created_status
+Revises: 29_create_payment_webhook_events
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '30_payments_user_created_status'
+down_revision = '29_create_payment_webhook_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Build the replacement first so statistics/history never lose their index
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_user_created_status', 'payments',
+            ['user_id', sa.text('created_at DESC'), 'status'],
+            postgresql_include=['payment_method', 'payment_type', 'amount'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'ix_payments_user_created_stats', table_name='payments',
+            postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_user_created_stats', 'payments', ['user_id', 'created_at'],
+            postgresql_include=['payment_method', 'status', 'amount'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'ix_payments_user_created_status', table_name='payments',
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,43 @@
+"""make payments.reference_id unique
+
+Revision ID: 31_payments_reference_id_unique
+Revises: 30_payments_user_created_status
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '31_payments_reference_id_unique'
+down_revision = '30_payments_user_created_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Build the unique index alongside the old one, then swap names; fails (and
+    # leaves the old index in place) if duplicate reference ids already exist
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_reference_id_unique', 'payments', ['reference_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'ix_payments_reference_id', table_name='payments',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.execute("ALTER INDEX ix_payments_reference_id_unique RENAME TO ix_payments_reference_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_reference_id_plain', 'payments', ['reference_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index(
+            'ix_payments_reference_id', table_name='payments',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.execute("ALTER INDEX ix_payments_reference_id_plain RENAME TO ix_payments_reference_id")
@@ -0,0 +1,45 @@
+"""products.custom_metadata to jsonb with city/brand expression indexes
+
+Revision ID: 33_products_metadata_jsonb
+Revises: 32_products_search_vector
+Create Date: 2026-10-18 17:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '33_products_metadata_jsonb'
+down_revision = '32_products_search_vector'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'products', 'custom_metadata',
+        type_=postgresql.JSONB(), existing_type=sa.JSON(), existing_nullable=True,
+        postgresql_using='custom_metadata::jsonb'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_meta_city', 'products', [sa.text("(custom_metadata ->> 'city')")],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_products_meta_brand', 'products', [sa.text("(custom_metadata ->> 'brand')")],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_meta_brand', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_products_meta_city', table_name='products', postgresql_concurrently=True, if_exists=True)
+    op.alter_column(
+        'products', 'custom_metadata',
+        type_=sa.JSON(), existing_type=postgresql.JSONB(), existing_nullable=True,
+        postgresql_using='custom_metadata::json'
+    )
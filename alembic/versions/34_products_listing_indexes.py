@@ -0,0 +1,34 @@
+"""add composite indexes for product listing filters and sorts
+
+Revision ID: 34_products_listing_indexes
+Revises: 33_products_metadata_jsonb
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '34_products_listing_indexes'
+down_revision = '33_products_metadata_jsonb'
+branch_labels = None
+depends_on = None
+
+
+_INDEXES = (
+    ('ix_products_guild_created', ['guild_id', 'created_at']),
+    ('ix_products_guild_price', ['guild_id', 'price']),
+    ('ix_products_created_at', ['created_at']),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in _INDEXES:
+            op.create_index(name, 'products', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(_INDEXES):
+            op.drop_index(name, table_name='products', postgresql_concurrently=True, if_exists=True)
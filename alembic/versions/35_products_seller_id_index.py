@@ -0,0 +1,28 @@
+"""index products.seller_id for the per-seller product limit probe
+
+Revision ID: 35_products_seller_id_index
+Revises: 34_products_listing_indexes
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '35_products_seller_id_index'
+down_revision = '34_products_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_seller_id', 'products', ['seller_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_seller_id', table_name='products', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""partial index for the approved-only public product listing
+
+Revision ID: 36_products_status_approved_index
+Revises: 35_products_seller_id_index
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '36_products_status_approved_index'
+down_revision = '35_products_seller_id_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_status_approved', 'products', [sa.text('created_at DESC')],
+            postgresql_where=sa.text("status = 'approved'"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_status_approved', table_name='products', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,28 @@
+"""index rfqs (buyer_id, created_at) for the RFQ creation throttle
+
+Revision ID: 37_rfqs_buyer_created_index
+Revises: 36_products_status_approved_index
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '37_rfqs_buyer_created_index'
+down_revision = '36_products_status_approved_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_rfqs_buyer_created', 'rfqs', ['buyer_id', 'created_at'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_rfqs_buyer_created', table_name='rfqs', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""rfqs.invited_seller_ids to jsonb with a GIN index for visibility filtering
+
+Revision ID: 38_rfqs_invited_sellers_jsonb
+Revises: 37_rfqs_buyer_created_index
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '38_rfqs_invited_sellers_jsonb'
+down_revision = '37_rfqs_buyer_created_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'rfqs', 'invited_seller_ids',
+        type_=postgresql.JSONB(), existing_type=sa.JSON(), existing_nullable=True,
+        postgresql_using='invited_seller_ids::jsonb'
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_rfqs_invited_seller_ids', 'rfqs', ['invited_seller_ids'],
+            postgresql_using='gin', postgresql_ops={'invited_seller_ids': 'jsonb_path_ops'},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_rfqs_invited_seller_ids', table_name='rfqs', postgresql_concurrently=True, if_exists=True)
+    op.alter_column(
+        'rfqs', 'invited_seller_ids',
+        type_=sa.JSON(), existing_type=postgresql.JSONB(), existing_nullable=True,
+        postgresql_using='invited_seller_ids::json'
+    )
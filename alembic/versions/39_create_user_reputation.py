@@ -0,0 +1,42 @@
+"""create user_reputation rollup of rating scores
+
+Revision ID: 39_create_user_reputation
+Revises: 38_rfqs_invited_sellers_jsonb
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '39_create_user_reputation'
+down_revision = '38_rfqs_invited_sellers_jsonb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_reputation',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True, nullable=False),
+        sa.Column('avg_score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('ratings_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+    # Backfill from existing ratings
+    op.execute(
+        """
+        INSERT INTO user_reputation (user_id, avg_score, ratings_count)
+        SELECT
+            ratee_id,
+            (AVG(quality) + AVG(timeliness) + AVG(communication) + AVG(reliability)) / 4.0,
+            COUNT(*)
+        FROM ratings
+        GROUP BY ratee_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_reputation')
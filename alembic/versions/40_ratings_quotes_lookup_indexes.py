@@ -0,0 +1,33 @@
+"""index ratings.ratee_id and quotes.rfq_id
+
+Revision ID: 40_ratings_quotes_lookup_indexes
+Revises: 39_create_user_reputation
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '40_ratings_quotes_lookup_indexes'
+down_revision = '39_create_user_reputation'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_ratings_ratee_id', 'ratings', ['ratee_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_quotes_rfq_id', 'quotes', ['rfq_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_quotes_rfq_id', table_name='quotes', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_ratings_ratee_id', table_name='ratings', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,53 @@
+"""store user_reputation as score_sum + ratings_count
+
+Revision ID: 41_user_reputation_score_sum
+Revises: 40_ratings_quotes_lookup_indexes
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41_user_reputation_score_sum'
+down_revision = '40_ratings_quotes_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user_reputation',
+        sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+    )
+
+    # Recompute exactly from ratings rather than from the accumulated average
+    op.execute(
+        """
+        UPDATE user_reputation AS r
+        SET score_sum = s.score_sum, ratings_count = s.ratings_count
+        FROM (
+            SELECT
+                ratee_id,
+                SUM(quality + timeliness + communication + reliability) / 4.0 AS score_sum,
+                COUNT(*) AS ratings_count
+            FROM ratings
+            GROUP BY ratee_id
+        ) AS s
+        WHERE s.ratee_id = r.user_id
+        """
+    )
+
+    op.drop_column('user_reputation', 'avg_score')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'user_reputation',
+        sa.Column('avg_score', sa.Float(), nullable=False, server_default='0'),
+    )
+    op.execute(
+        "UPDATE user_reputation SET avg_score = score_sum / ratings_count WHERE ratings_count > 0"
+    )
+    op.drop_column('user_reputation', 'score_sum')
@@ -3,6 +3,8 @@ import asyncio
 import logging
 import redis.asyncio as redis_async
 import aio_pika
+import asyncpg
+import orjson
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -51,4 +53,59 @@ async def get_rabbitmq_connection(max_retries: int = 5, delay: float = 2.0) -> a
             logger.warning(f"RabbitMQ connection attempt {attempt} failed: {e}")
             await asyncio.sleep(delay)
 
-    raise ConnectionError(f"Failed to connect to RabbitMQ at {settings.RABBITMQ_URL} after {max_retries} attempts")
\ No newline at end of file
+    raise ConnectionError(f"Failed to connect to RabbitMQ at {settings.RABBITMQ_URL} after {max_retries} attempts")
+
+
+# Raw asyncpg pool for hot paths that bypass the ORM
+_pg_pool_instance: asyncpg.Pool | None = None
+
+def _asyncpg_dsn(url: str) -> str:
+    """Strip the SQLAlchemy driver suffix so asyncpg accepts the URL."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+def _orjson_dumps(value) -> str:
+    return orjson.dumps(value, default=str).decode()
+
+async def _init_pg_connection(conn: asyncpg.Connection) -> None:
+    """Encode/decode json and jsonb parameters with orjson instead of stdlib json."""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=_orjson_dumps,
+            decoder=orjson.loads,
+            schema="pg_catalog"
+        )
+
+async def get_pg_pool(max_retries: int = 5, delay: float = 2.0) -> asyncpg.Pool:
+    """Return a shared asyncpg pool with prepared-statement caching."""
+    global _pg_pool_instance
+    if _pg_pool_instance:
+        return _pg_pool_instance
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            _pg_pool_instance = await asyncpg.create_pool(
+                _asyncpg_dsn(settings.DATABASE_URL),
+                min_size=settings.PG_POOL_MIN_SIZE,
+                max_size=settings.PG_POOL_MAX_SIZE,
+                statement_cache_size=1024,
+                init=_init_pg_connection
+            )
+            logger.info("✅ asyncpg pool ready")
+            return _pg_pool_instance
+        except Exception as e:
+            logger.warning(f"asyncpg pool attempt {attempt} failed: {e}")
+            if attempt < max_retries:
+                await asyncio.sleep(delay)
+
+    raise ConnectionError(f"Failed to create asyncpg pool for {settings.DATABASE_URL} after {max_retries} attempts")
+
+def get_pg_pool_nowait() -> asyncpg.Pool | None:
+    """Return the asyncpg pool if it has already been created, else None."""
+    return _pg_pool_instance
+
+async def close_pg_pool() -> None:
+    global _pg_pool_instance
+    if _pg_pool_instance:
+        await _pg_pool_instance.close()
+        _pg_pool_instance = None
@@ -8,6 +8,7 @@ from app.db.session import (
     AsyncSessionLocal,
     SyncSessionLocal,
     get_session,
+    get_transaction,
     get_db_sync,
     get_db_sync_dependency,
     get_db
@@ -22,6 +23,7 @@ __all__ = [
     "AsyncSessionLocal", 
     "SyncSessionLocal", 
     "get_session", 
+    "get_transaction",
     "get_db_sync",
     "get_db_sync_dependency",
     "get_db"
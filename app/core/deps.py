@@ -29,11 +29,41 @@ from app.core.auth import get_current_user_sync, get_current_user_optional_sync
 get_current_user = get_current_user_sync
 get_current_user_optional = get_current_user_optional_sync
 
+# Single-pass JSON bodies: validate the raw request bytes with pydantic's
+# model_validate_json (jiter) instead of json.loads + validating the dict
+from functools import cache
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+@cache
+def json_body(model: type[BaseModel]):
+    """Dependency parsing the request body as ``model``; pair with json_body_openapi"""
+    async def parse(request: Request) -> BaseModel:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            )
+    return parse
+
+def json_body_openapi(model: type[BaseModel]) -> dict:
+    """openapi_extra documenting the body that json_body(model) reads"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
 # Type hints for better IDE support
 __all__ = [
     "get_db",
     "get_current_user", 
     "get_current_user_optional",
+    "json_body",
+    "json_body_openapi",
     "Session",
     "AsyncSession",
     "User"
@@ -184,11 +184,12 @@ class PluginLoader:
         return loaded
 
     async def shutdown_all(self, app: FastAPI) -> None:
-        for p in getattr(app.state, "plugins", []) or []:
-            try:
-                await p.on_shutdown(app)
-            except Exception as e:
-                print(f"[loader] Shutdown error for '{p.slug}': {e}")
+        # Shutdown hooks are independent of each other, so run them concurrently
+        plugins = list(getattr(app.state, "plugins", []) or [])
+        results = await asyncio.gather(*(p.on_shutdown(app) for p in plugins), return_exceptions=True)
+        for p, result in zip(plugins, results):
+            if isinstance(result, Exception):
+                print(f"[loader] Shutdown error for '{p.slug}': {result}")
 
     # ===== Optional: naive hot-reload for dev =====
     def enable_hot_reload(self, app: FastAPI, engine: AsyncEngine, interval_sec: float = 2.0) -> None:
@@ -0,0 +1,35 @@
+"""
+Streaming JSON list responses
+Serialize large query results chunk by chunk instead of materializing every row
+"""
+from typing import AsyncIterator, Callable, Sequence
+
+from sqlalchemy.sql import Select
+
+STREAM_CHUNK_SIZE = 200
+
+
+async def stream_rows(stmt: Select, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Sequence]:
+    """Yield ORM rows of ``stmt`` in chunks from a server-side cursor.
+
+    Uses its own session: a request-scoped session dependency is closed before
+    a StreamingResponse body starts iterating.
+    """
+    from app.db.session import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.scalars().partitions():
+            yield rows
+
+
+async def json_array(chunks: AsyncIterator[Sequence], render: Callable[[Sequence], bytes]) -> AsyncIterator[bytes]:
+    """Encode chunks as one JSON array; ``render`` turns a chunk into a JSON array"""
+    yield b"["
+    first = True
+    async for rows in chunks:
+        if not rows:
+            continue
+        body = render(rows)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
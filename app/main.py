@@ -20,6 +20,7 @@ from app.core.security_docs import apply_security_requirements, add_security_exa
 from fastapi.responses import JSONResponse
 from fastapi import Request
 from contextlib import asynccontextmanager
+from sqlalchemy.orm import configure_mappers
 
 # Lifespan context manager for startup and shutdown events
 @asynccontextmanager
@@ -28,6 +29,10 @@ async def lifespan(app: FastAPI):
     try:
         loader = PluginLoader()
         await loader.load_all(app, engine)
+        # All plugin models are imported now: configure mappers once here
+        # rather than on the first query of the first request, so a broken
+        # mapping fails startup instead of the first request
+        configure_mappers()
         if settings.ENABLE_PLUGIN_HOT_RELOAD:
             loader.enable_hot_reload(app, engine)
             
@@ -40,7 +45,8 @@ async def lifespan(app: FastAPI):
         
     yield  # This is where the app runs
     
-    # Shutdown: cleanup connections
+    # Shutdown: plugin hooks first, then cleanup connections
+    await loader.shutdown_all(app)
     await engine.dispose()
     await redis.close()
 
@@ -1,3 +1,4 @@
+import logging
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
@@ -7,6 +8,8 @@ async def lifespan(app):
 from fastapi import FastAPI, APIRouter
 from app.core.plugins.base import PluginBase, PluginConfig
 
+logger = logging.getLogger(__name__)
+
 # -----------------------------
 # Plugin configuration schema
 # -----------------------------
@@ -49,6 +52,29 @@ class Plugin(PluginBase):
         async def shutdown():
             print(f"[{self.slug}] plugin shutting down")
 
+    async def on_startup(self, app: FastAPI) -> None:
+        from . import crud
+        from .http_client import get_shared_client
+        from app.core.connections import get_pg_pool
+        app.state.payments_http = get_shared_client()
+        crud.start_webhook_flusher()
+        app.state.payments_webhook_queue = crud._webhook_queue
+        crud.start_webhook_partition_maintainer()
+        # Callback hot path uses raw asyncpg; without the pool callbacks take the ORM path
+        try:
+            await get_pg_pool(max_retries=1, delay=0)
+        except ConnectionError as e:
+            logger.warning("No asyncpg pool, payment callbacks will use the ORM path: %s", e)
+
+    async def on_shutdown(self, app: FastAPI) -> None:
+        from . import crud
+        from .http_client import close_shared_client
+        from app.core.connections import close_pg_pool
+        await crud.stop_webhook_partition_maintainer()
+        await crud.stop_webhook_flusher()
+        await close_pg_pool()
+        await close_shared_client()
+
     # -----------------------------
     # Async DB init
     # -----------------------------
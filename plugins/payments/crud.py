@@ -1,30 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+from types import MappingProxyType, SimpleNamespace
+
+import orjson
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy import select, update, insert, func, bindparam, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Dict, Any, Mapping, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-from .models import Payment, PaymentStatus, PaymentType, PaymentRefund, PaymentWebhook, WithdrawalRequest
+from app.core.connections import get_pg_pool_nowait
+from .models import (
+    Payment, PaymentStatus, PaymentMethod, PaymentType, PaymentRefund, PaymentWebhook,
+    WithdrawalRequest, PaymentDailyStats, PaymentWebhookEvent
+)
+from plugins.wallet.models import Wallet, Transaction, TransactionType
 from .schemas import PaymentCreate, PaymentUpdate
+from .iran_providers import PROVIDER_SECRETS, verify_webhook
+
+logger = logging.getLogger(__name__)
+
+# Enum members are singletons, so hot comparisons can use `is`
+_COMPLETED = PaymentStatus.COMPLETED
+_FAILED = PaymentStatus.FAILED
+# Statuses a provider callback may still move a payment out of
+_OPEN_STATUSES = (PaymentStatus.PENDING, PaymentStatus.PROCESSING)
+
 
 # -----------------------------
 # Payment CRUD Operations
 # -----------------------------
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+def _daily_stats_upsert(
+    day,
+    provider: Any,
+    payment_type: Any,
+    count: int = 0,
+    completed: int = 0,
+    failed: int = 0,
+    amount: Decimal = Decimal(0)
+):
+    """INSERT ... ON CONFLICT DO UPDATE adding deltas to a payment_daily_stats row"""
+    stmt = pg_insert(PaymentDailyStats).values(
+        date=day,
+        provider=_enum_value(provider),
+        payment_type=_enum_value(payment_type),
+        count=count,
+        completed_count=completed,
+        failed_count=failed,
+        amount_sum=amount
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[PaymentDailyStats.date, PaymentDailyStats.provider, PaymentDailyStats.payment_type],
+        set_={
+            "count": PaymentDailyStats.count + stmt.excluded.count,
+            "completed_count": PaymentDailyStats.completed_count + stmt.excluded.completed_count,
+            "failed_count": PaymentDailyStats.failed_count + stmt.excluded.failed_count,
+            "amount_sum": PaymentDailyStats.amount_sum + stmt.excluded.amount_sum,
+        }
+    )
+
+def _terminal_stats_upsert(payment: Any, status: PaymentStatus):
+    """Rollup delta for a payment reaching COMPLETED/FAILED, keyed by its creation day"""
+    created_at = payment.created_at or datetime.utcnow()
+    completed = status is _COMPLETED
+    return _daily_stats_upsert(
+        created_at.date(),
+        payment.payment_method,
+        payment.payment_type,
+        completed=1 if completed else 0,
+        failed=0 if completed else 1,
+        amount=payment.amount if completed else Decimal(0)
+    )
+
+TOPUP_DESCRIPTION = "Wallet top-up via payment gateway"
+
+async def _credit_wallet_topup(db: AsyncSession, payment: Any) -> None:
+    """Credit a completed top-up to its owner's wallet in the caller's transaction,
+    so the credit commits (or rolls back) together with the COMPLETED status"""
+    amount = float(payment.amount)
+    owner_wallet = (
+        select(Wallet.id)
+        .where(Wallet.user_id == payment.user_id, Wallet.currency == payment.currency)
+        .order_by(Wallet.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Wallet)
+        .where(Wallet.id == owner_wallet)
+        .values(balance=Wallet.balance + amount)
+        .returning(Wallet.id)
+    )
+    wallet_id = result.scalar()
+    if wallet_id is None:
+        logger.warning("No %s wallet for user %s; payment %s not credited", payment.currency, payment.user_id, payment.id)
+        return
+    await db.execute(insert(Transaction).values(
+        wallet_id=wallet_id,
+        amount=amount,
+        transaction_type=TransactionType.DEPOSIT,
+        reference=payment.reference_id,
+        description=TOPUP_DESCRIPTION,
+        status="completed"
+    ))
+
+async def _insert_returning(db: AsyncSession, model, values: Dict[str, Any]):
+    """INSERT ... RETURNING the mapped row, so server defaults (id, created_at)
+    come back on the insert itself instead of a follow-up refresh SELECT"""
+    result = await db.execute(insert(model).values(**values).returning(model))
+    return result.scalar_one()
+
+_PAYMENT_COLUMNS = frozenset(Payment.__table__.columns.keys())
+
 async def create_payment(db: AsyncSession, payment_data: Dict[str, Any]) -> Payment:
-    """Create a new payment record"""
-    payment = Payment(**payment_data)
-    db.add(payment)
+    """Create a new payment record.
+
+    The row may be inserted already FAILED or PROCESSING (e.g. after the provider
+    replied), which is counted in the daily rollup in the same commit. Keys that
+    aren't columns (description, metadata) are ignored, as the ORM constructor did.
+    """
+    payment = await _insert_returning(
+        db, Payment, {k: v for k, v in payment_data.items() if k in _PAYMENT_COLUMNS}
+    )
+    # Keyed by the row's server-side creation day, like the terminal deltas, so
+    # a payment's count and its completed/failed counts land in the same row
+    await db.execute(_daily_stats_upsert(
+        (payment.created_at or datetime.utcnow()).date(), payment.payment_method, payment.payment_type, count=1,
+        failed=1 if payment.status is _FAILED else 0
+    ))
     await db.commit()
-    await db.refresh(payment)
     return payment
 
+# Callback hot-path lookups are built once with bind parameters and run against
+# a shared compiled cache, so SQLAlchemy never recompiles them per request
+_COMPILED_CACHE: Dict[Any, Any] = {}
+_CACHED_EXECUTION = {"compiled_cache": _COMPILED_CACHE}
+_PAYMENT_BY_ID = select(Payment).where(Payment.id == bindparam("payment_id"))
+_PAYMENT_BY_REFERENCE = select(Payment).where(Payment.reference_id == bindparam("reference_id"))
+
 async def get_payment(db: AsyncSession, payment_id: int) -> Optional[Payment]:
     """Get payment by ID"""
-    return await db.get(Payment, payment_id)
+    result = await db.execute(
+        _PAYMENT_BY_ID, {"payment_id": payment_id}, execution_options=_CACHED_EXECUTION
+    )
+    return result.scalars().first()
+
+async def get_payment_with_refunds(db: AsyncSession, payment_id: int) -> Optional[Payment]:
+    """Get payment by ID with its refunds loaded in one extra IN query"""
+    result = await db.execute(
+        select(Payment)
+        .options(selectinload(Payment.refunds))
+        .where(Payment.id == payment_id)
+    )
+    return result.scalars().first()
+
+async def list_payments_with_refunds(db: AsyncSession, payment_ids: List[int]) -> List[Payment]:
+    """Get several payments with refunds batch-loaded (2 queries instead of N+1)"""
+    if not payment_ids:
+        return []
+    result = await db.execute(
+        select(Payment)
+        .options(selectinload(Payment.refunds))
+        .where(Payment.id.in_(payment_ids))
+    )
+    return result.scalars().all()
 
 async def get_payment_by_reference(db: AsyncSession, reference_id: str) -> Optional[Payment]:
     """Get payment by reference ID"""
     result = await db.execute(
-        select(Payment).where(Payment.reference_id == reference_id)
+        _PAYMENT_BY_REFERENCE, {"reference_id": reference_id}, execution_options=_CACHED_EXECUTION
     )
     return result.scalars().first()
 
@@ -34,12 +186,35 @@ async def update_payment_status(
     status: PaymentStatus,
     provider_error: Optional[str] = None,
     provider_transaction_id: Optional[str] = None,
-    provider_response: Optional[Dict[str, Any]] = None
+    provider_response: Optional[Dict[str, Any]] = None,
+    expected_statuses: Optional[tuple] = None,
+    credit_wallet: bool = False
+) -> Optional[Payment]:
+    """Update payment status and related fields.
+
+    With ``expected_statuses`` the UPDATE only applies while the payment is still
+    in one of them; None is returned when nothing matched. With ``credit_wallet``
+    a wallet top-up reaching COMPLETED is credited in the same commit.
+    """
+    return await _update_payment_where(
+        db, Payment.id == payment_id, status,
+        provider_error, provider_transaction_id, provider_response, expected_statuses, credit_wallet
+    )
+
+async def _update_payment_where(
+    db: AsyncSession,
+    criteria,
+    status: PaymentStatus,
+    provider_error: Optional[str] = None,
+    provider_transaction_id: Optional[str] = None,
+    provider_response: Optional[Dict[str, Any]] = None,
+    expected_statuses: Optional[tuple] = None,
+    credit_wallet: bool = False
 ) -> Optional[Payment]:
-    """Update payment status and related fields"""
+    now = datetime.utcnow()
     update_data = {
         "status": status,
-        "updated_at": datetime.utcnow()
+        "updated_at": now
     }
     
     if provider_error is not None:
@@ -51,17 +226,28 @@ async def update_payment_status(
     if provider_response is not None:
         update_data["provider_response"] = provider_response
     
-    if status == PaymentStatus.COMPLETED:
-        update_data["completed_at"] = datetime.utcnow()
+    if status is _COMPLETED:
+        update_data["completed_at"] = now
     
-    await db.execute(
-        update(Payment)
-        .where(Payment.id == payment_id)
-        .values(**update_data)
+    stmt = update(Payment).where(criteria)
+    if expected_statuses:
+        stmt = stmt.where(Payment.status.in_(expected_statuses))
+    # RETURNING hands back the updated row, so no follow-up SELECT is needed
+    result = await db.execute(
+        stmt.values(**update_data).returning(Payment),
+        execution_options={"populate_existing": True}
     )
+    payment = result.scalars().first()
+    if payment is None:
+        return None
+    if status is _COMPLETED or status is _FAILED:
+        await db.execute(_terminal_stats_upsert(payment, status))
+    if credit_wallet and status is _COMPLETED and payment.payment_type is PaymentType.WALLET_TOPUP:
+        await _credit_wallet_topup(db, payment)
     await db.commit()
     
-    return await get_payment(db, payment_id)
+    invalidate_payment_statistics(payment.user_id)
+    return payment
 
 async def list_user_payments(
     db: AsyncSession,
@@ -70,58 +256,98 @@ async def list_user_payments(
     page_size: int = 10,
     status: Optional[PaymentStatus] = None,
     payment_type: Optional[PaymentType] = None
-) -> List[Payment]:
-    """Get user's payment history with pagination and filters"""
-    query = select(Payment).where(Payment.user_id == user_id)
-    
+) -> Dict[str, Any]:
+    """Get one page of a user's payment history plus the total match count"""
+    filters = [Payment.user_id == user_id]
     if status:
-        query = query.where(Payment.status == status)
-    
+        filters.append(Payment.status == status)
     if payment_type:
-        query = query.where(Payment.payment_type == payment_type)
+        filters.append(Payment.payment_type == payment_type)
     
-    # Order by created_at descending
-    query = query.order_by(Payment.created_at.desc())
-    
-    # Apply pagination
     offset = (page - 1) * page_size
-    query = query.offset(offset).limit(page_size)
+    result = await db.execute(
+        select(Payment)
+        .where(*filters)
+        .order_by(Payment.created_at.desc())
+        .offset(offset)
+        .limit(page_size)
+    )
+    payments = result.scalars().all()
     
-    result = await db.execute(query)
-    return result.scalars().all()
+    # A short, non-empty page is the last one, so the total is already known.
+    # (One AsyncSession cannot run both queries concurrently.)
+    if payments and len(payments) < page_size:
+        total = offset + len(payments)
+    else:
+        total = await db.scalar(select(func.count()).select_from(Payment).where(*filters))
+    
+    return {"payments": payments, "total": total}
+
+# Dashboard widgets poll statistics every few seconds; cache per user for 30 s.
+# Values are {days: stats} so one pop invalidates every window for that user.
+STATISTICS_CACHE_TTL = 30
+_statistics_cache: TTLCache = TTLCache(maxsize=10_000, ttl=STATISTICS_CACHE_TTL)
+
+def invalidate_payment_statistics(user_id: int) -> None:
+    _statistics_cache.pop(user_id, None)
 
 async def get_payment_statistics(
     db: AsyncSession,
     user_id: int,
     days: int = 30
 ) -> Dict[str, Any]:
-    """Get payment statistics for a user"""
+    """Get payment statistics for a user (cached for STATISTICS_CACHE_TTL seconds)"""
+    cached = _statistics_cache.get(user_id)
+    if cached is not None and days in cached:
+        return cached[days]
+    
+    stats = await _compute_payment_statistics(db, user_id, days)
+    _statistics_cache.setdefault(user_id, {})[days] = stats
+    return stats
+
+_PAYMENT_STATS_BY_PROVIDER = (
+    select(
+        Payment.payment_method,
+        Payment.status,
+        func.count(),
+        func.coalesce(func.sum(Payment.amount), 0)
+    )
+    .where(Payment.user_id == bindparam("user_id"))
+    .where(Payment.created_at >= bindparam("start_date"))
+    .group_by(Payment.payment_method, Payment.status)
+)
+
+async def _compute_payment_statistics(
+    db: AsyncSession,
+    user_id: int,
+    days: int
+) -> Dict[str, Any]:
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    # Get all payments in the date range
+    # Aggregate in Postgres: one row per (provider, status) instead of one per payment
     result = await db.execute(
-        select(Payment)
-        .where(Payment.user_id == user_id)
-        .where(Payment.created_at >= start_date)
+        _PAYMENT_STATS_BY_PROVIDER,
+        {"user_id": user_id, "start_date": start_date},
+        execution_options=_CACHED_EXECUTION
     )
-    payments = result.scalars().all()
-    
-    total_payments = len(payments)
-    total_amount = sum(p.amount for p in payments if p.status == PaymentStatus.COMPLETED)
-    successful_payments = len([p for p in payments if p.status == PaymentStatus.COMPLETED])
-    failed_payments = len([p for p in payments if p.status == PaymentStatus.FAILED])
     
-    # Group by provider
     provider_stats = {}
-    for payment in payments:
-        provider = payment.payment_method
-        if provider not in provider_stats:
-            provider_stats[provider] = {"count": 0, "amount": 0, "successful": 0}
-        
-        provider_stats[provider]["count"] += 1
-        if payment.status == PaymentStatus.COMPLETED:
-            provider_stats[provider]["amount"] += payment.amount
-            provider_stats[provider]["successful"] += 1
+    total_payments = 0
+    failed_payments = 0
+    for provider, status, count, amount in result.all():
+        stats = provider_stats.get(provider)
+        if stats is None:
+            stats = provider_stats[provider] = {"count": 0, "amount": 0, "successful": 0}
+        stats["count"] += count
+        total_payments += count
+        if status is _COMPLETED:
+            stats["amount"] += amount
+            stats["successful"] += count
+        elif status is _FAILED:
+            failed_payments += count
+    
+    total_amount = sum(stats["amount"] for stats in provider_stats.values())
+    successful_payments = sum(stats["successful"] for stats in provider_stats.values())
     
     # Calculate success rates
     for provider in provider_stats:
@@ -141,11 +367,11 @@ async def get_payment_statistics(
 # -----------------------------
 # Withdrawal Requests
 # -----------------------------
-async def create_withdrawal_request(db: AsyncSession, user_id: int, amount: float, currency: str, bank_account: Dict[str, Any]) -> WithdrawalRequest:
-    req = WithdrawalRequest(user_id=user_id, amount=amount, currency=currency, bank_account=bank_account)
-    db.add(req)
+async def create_withdrawal_request(db: AsyncSession, user_id: int, amount: Decimal, currency: str, bank_account: Dict[str, Any]) -> WithdrawalRequest:
+    req = await _insert_returning(db, WithdrawalRequest, {
+        "user_id": user_id, "amount": amount, "currency": currency, "bank_account": bank_account
+    })
     await db.commit()
-    await db.refresh(req)
     return req
 
 async def list_withdrawal_requests(db: AsyncSession, user_id: int | None = None) -> List[WithdrawalRequest]:
@@ -167,9 +393,118 @@ async def update_withdrawal_status(db: AsyncSession, request_id: int, status: st
     await db.refresh(req)
     return req
 
+# -----------------------------
+# Provider Configuration
+# -----------------------------
+PROVIDER_CONFIG_TTL = 300  # seconds
+
+def _provider_config_key(name: str) -> str:
+    return f"pp:{name}"
+
+def _env_credentials(name: str) -> Tuple[str, str]:
+    return (
+        os.getenv(f"{name.upper()}_API_KEY", "test_key"),
+        os.getenv(f"{name.upper()}_MERCHANT_ID", "test_merchant"),
+    )
+
+# Read once at import: (api_key, merchant_id) per provider
+PROVIDER_CREDS: Mapping[str, Tuple[str, str]] = MappingProxyType(
+    {method.value: _env_credentials(method.value) for method in PaymentMethod}
+)
+
+def _env_provider_config(name: str) -> Dict[str, Any]:
+    """Environment-derived defaults used when payment_providers has no row"""
+    api_key, merchant_id = PROVIDER_CREDS.get(name) or _env_credentials(name)
+    return {
+        "api_key": api_key,
+        "merchant_id": merchant_id,
+        "callback_url": f"/api/payments/callback/{name}",
+        "is_test_mode": True  # Set to False in production
+    }
+
+async def _fetch_provider_config(name: str) -> Dict[str, Any]:
+    """Merge the payment_providers row (if any) over the environment defaults.
+
+    Runs in its own session so a missing table can't poison the caller's transaction.
+    """
+    from app.db.session import AsyncSessionLocal
+    config = _env_provider_config(name)
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text(
+                    "SELECT api_key, merchant_id, callback_url, is_test_mode, config "
+                    "FROM payment_providers WHERE name = :name AND is_active"
+                ),
+                {"name": name}
+            )
+            row = result.mappings().first()
+    except Exception as e:
+        logger.warning("Could not load payment provider %s from the database: %s", name, e)
+        return config
+    if row:
+        config.update(row["config"] or {})
+        config.update({k: row[k] for k in ("api_key", "merchant_id", "callback_url", "is_test_mode") if row[k] is not None})
+    return config
+
+async def load_provider_config(name: str) -> Dict[str, Any]:
+    """Provider config from Redis (TTL PROVIDER_CONFIG_TTL), falling back to the database"""
+    from app.core.connections import get_redis
+    name = _enum_value(name)
+    key = _provider_config_key(name)
+    try:
+        redis = await get_redis(max_retries=1, delay=0)
+        cached = await redis.get(key)
+    except Exception:
+        redis, cached = None, None
+    if cached:
+        return orjson.loads(cached)
+    
+    config = await _fetch_provider_config(name)
+    if redis is not None:
+        try:
+            await redis.setex(key, PROVIDER_CONFIG_TTL, orjson.dumps(config).decode())
+        except Exception as e:
+            logger.warning("Could not cache payment provider %s config: %s", name, e)
+    return config
+
+async def invalidate_provider_config(name: str) -> None:
+    """Drop the cached config so the next load_provider_config re-reads payment_providers"""
+    from app.core.connections import get_redis
+    name = _enum_value(name)
+    try:
+        redis = await get_redis(max_retries=1, delay=0)
+        await redis.delete(_provider_config_key(name))
+    except Exception as e:
+        logger.warning("Could not invalidate payment provider %s config: %s", name, e)
+
 # -----------------------------
 # Payment Callback Processing
 # -----------------------------
+class _DuplicateCallback(Exception):
+    """The provider event was already applied; raised to roll back the retry's writes"""
+
+class _PaymentNotOpen(Exception):
+    """No open payment matched the callback; raised to roll back its event claim"""
+
+def _callback_event_id(callback_data: Dict[str, Any]) -> str:
+    """Idempotency key for a parsed callback: the provider transaction id when
+    there is one, otherwise the payment reference plus the reported outcome"""
+    transaction_id = callback_data.get("transaction_id")
+    if transaction_id:
+        return str(transaction_id)
+    return f"{callback_data['reference_id']}:{callback_data['status']}"
+
+async def _claim_webhook_event(db: AsyncSession, provider_name: str, external_event_id: str) -> bool:
+    """Record a provider event in the caller's transaction; False if it was already recorded"""
+    result = await db.execute(
+        pg_insert(PaymentWebhookEvent)
+        .values(provider=provider_name, external_event_id=external_event_id)
+        .on_conflict_do_nothing(index_elements=["provider", "external_event_id"])
+        .returning(PaymentWebhookEvent.id)
+    )
+    return result.scalar() is not None
+
 async def process_payment_callback(
     db: AsyncSession,
     provider_name: str,
@@ -184,66 +519,206 @@ async def process_payment_callback(
         if not callback_data:
             return {"success": False, "error": "Invalid callback data"}
         
-        # Find payment by reference ID
-        payment = await get_payment_by_reference(db, callback_data["reference_id"])
-        if not payment:
-            return {"success": False, "error": "Payment not found"}
-        
-        # Verify callback signature if provided
-        if callback_data.get("signature"):
-            if not verify_callback_signature(provider_name, body, callback_data["signature"]):
+        # Verify the signature before touching the DB; once a provider has a
+        # signing secret configured, unsigned callbacks are rejected too
+        signature = callback_data.get("signature")
+        if signature or PROVIDER_SECRETS.get(provider_name):
+            if not verify_webhook(provider_name, body, signature):
                 return {"success": False, "error": "Invalid signature"}
         
-        # Update payment status based on provider response
-        if callback_data["status"] == "success":
-            await update_payment_status(
-                db,
-                payment.id,
-                PaymentStatus.COMPLETED,
-                provider_transaction_id=callback_data.get("transaction_id"),
-                provider_response=callback_data
-            )
-        else:
-            await update_payment_status(
-                db,
-                payment.id,
-                PaymentStatus.FAILED,
-                provider_error=callback_data.get("error_message", "Payment failed"),
-                provider_response=callback_data
-            )
+        event_id = _callback_event_id(callback_data)
         
-        # Log webhook
-        await log_payment_webhook(db, provider_name, "payment_callback", callback_data)
+        # Hot path: raw asyncpg with cached prepared statements, skipping the ORM
+        pool = get_pg_pool_nowait()
+        if pool is not None:
+            try:
+                payment = await _apply_callback_via_pool(pool, provider_name, callback_data, event_id)
+            except _DuplicateCallback:
+                return {"success": True, "duplicate": True, "payment": None}
+            if not payment:
+                return {"success": False, "error": "Payment not found or already processed"}
+            return {"success": True, "payment": payment}
+        
+        # The event claim and the status update commit together (or not at all)
+        if not await _claim_webhook_event(db, provider_name, event_id):
+            await db.rollback()
+            return {"success": True, "duplicate": True, "payment": None}
+        
+        # Single guarded UPDATE: late or duplicate callbacks for an already
+        # finalized payment match no row and never flip its status
+        succeeded = callback_data["status"] == "success"
+        payment = await _update_payment_where(
+            db,
+            Payment.reference_id == callback_data["reference_id"],
+            _COMPLETED if succeeded else _FAILED,
+            provider_error=None if succeeded else callback_data.get("error_message", "Payment failed"),
+            provider_transaction_id=callback_data.get("transaction_id") if succeeded else None,
+            provider_response=callback_data,
+            expected_statuses=_OPEN_STATUSES,
+            credit_wallet=True
+        )
+        if not payment:
+            await db.rollback()
+            return {"success": False, "error": "Payment not found or already processed"}
+        
+        # Log webhook (buffered; falls back to a direct insert if the flusher isn't running)
+        if not enqueue_payment_webhook(provider_name, "payment_callback", callback_data, callback_data.get("signature")):
+            await log_payment_webhook(db, provider_name, "payment_callback", callback_data, callback_data.get("signature"))
         
         return {"success": True, "payment": payment}
         
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+_CALLBACK_UPDATE_SQL = """
+UPDATE payments
+SET status = $2,
+    updated_at = now(),
+    provider_transaction_id = COALESCE($3, provider_transaction_id),
+    provider_error = COALESCE($4, provider_error),
+    provider_response = $5::json,
+    completed_at = CASE WHEN $6::boolean THEN now() ELSE completed_at END
+WHERE reference_id = $1
+  AND status IN ('PENDING', 'PROCESSING')
+RETURNING id, user_id, amount, currency, status, payment_method, payment_type, reference_id, created_at
+"""
+
+_DAILY_STATS_UPSERT_SQL = """
+INSERT INTO payment_daily_stats
+    (date, provider, payment_type, count, completed_count, failed_count, amount_sum)
+VALUES ($1, $2, $3, 0, $4, $5, $6)
+ON CONFLICT (date, provider, payment_type) DO UPDATE SET
+    completed_count = payment_daily_stats.completed_count + excluded.completed_count,
+    failed_count = payment_daily_stats.failed_count + excluded.failed_count,
+    amount_sum = payment_daily_stats.amount_sum + excluded.amount_sum
+"""
+
+_EVENT_CLAIM_SQL = """
+INSERT INTO payment_webhook_events (provider, external_event_id, created_at)
+VALUES ($1, $2, now())
+ON CONFLICT (provider, external_event_id) DO NOTHING
+RETURNING id
+"""
+
+_WALLET_CREDIT_SQL = """
+UPDATE wallets
+SET balance = balance + $3, updated_at = now()
+WHERE id = (SELECT id FROM wallets WHERE user_id = $1 AND currency = $2 ORDER BY id LIMIT 1)
+RETURNING id
+"""
+
+_WALLET_DEPOSIT_INSERT_SQL = """
+INSERT INTO transactions (wallet_id, amount, transaction_type, reference, description, status, created_at, updated_at)
+VALUES ($1, $2, 'DEPOSIT', $3, $4, 'completed', now(), now())
+"""
+
+_WEBHOOK_INSERT_SQL = """
+INSERT INTO payment_webhooks (provider_name, event_type, payload, signature, processed, created_at)
+VALUES ($1, $2, $3::json, $4, 0, now())
+"""
+
+def _as_enum(enum_cls, raw):
+    """Map a raw column value to its enum (SQLAlchemy's Enum persists member names)"""
+    if raw in enum_cls.__members__:
+        return enum_cls[raw]
+    return enum_cls(raw)
+
+async def _apply_callback_via_pool(
+    pool,
+    provider_name: str,
+    callback_data: Dict[str, Any],
+    event_id: str
+) -> Optional[SimpleNamespace]:
+    """Update the payment and log the webhook with asyncpg, returning the payment row.
+
+    The event is claimed first, as on the ORM path, so a retry of an applied event
+    raises _DuplicateCallback (after rolling back) even once the payment is final.
+    A completed wallet top-up is credited in the same transaction. Returns None,
+    with the claim rolled back, when no open payment matches.
+    """
+    succeeded = callback_data["status"] == "success"
+    status = _COMPLETED if succeeded else _FAILED
+    error = None if succeeded else callback_data.get("error_message", "Payment failed")
+    
+    async with pool.acquire() as conn:
+        try:
+            async with conn.transaction():
+                if await conn.fetchval(_EVENT_CLAIM_SQL, provider_name, event_id) is None:
+                    raise _DuplicateCallback(event_id)
+                row = await conn.fetchrow(
+                    _CALLBACK_UPDATE_SQL,
+                    callback_data["reference_id"],
+                    status.name,
+                    callback_data.get("transaction_id") if succeeded else None,
+                    error,
+                    callback_data,
+                    succeeded
+                )
+                if row is None:
+                    raise _PaymentNotOpen(callback_data["reference_id"])
+                payment = SimpleNamespace(**dict(row))
+                payment.status = _as_enum(PaymentStatus, payment.status)
+                payment.payment_method = _as_enum(PaymentMethod, payment.payment_method)
+                payment.payment_type = _as_enum(PaymentType, payment.payment_type)
+                await conn.execute(
+                    _DAILY_STATS_UPSERT_SQL,
+                    (payment.created_at or datetime.utcnow()).date(),
+                    payment.payment_method.value,
+                    payment.payment_type.value,
+                    1 if succeeded else 0,
+                    0 if succeeded else 1,
+                    payment.amount if succeeded else Decimal(0)
+                )
+                if succeeded and payment.payment_type is PaymentType.WALLET_TOPUP:
+                    amount = float(payment.amount)
+                    wallet_id = await conn.fetchval(_WALLET_CREDIT_SQL, payment.user_id, payment.currency, amount)
+                    if wallet_id is not None:
+                        await conn.execute(
+                            _WALLET_DEPOSIT_INSERT_SQL, wallet_id, amount, payment.reference_id, TOPUP_DESCRIPTION
+                        )
+                    else:
+                        logger.warning(
+                            "No %s wallet for user %s; payment %s not credited",
+                            payment.currency, payment.user_id, payment.id
+                        )
+        except _PaymentNotOpen:
+            return None
+        invalidate_payment_statistics(payment.user_id)
+        if not enqueue_payment_webhook(provider_name, "payment_callback", callback_data, callback_data.get("signature")):
+            await conn.execute(
+                _WEBHOOK_INSERT_SQL, provider_name, "payment_callback", callback_data, callback_data.get("signature")
+            )
+    
+    return payment
+
 def parse_provider_callback(provider_name: str, body: bytes, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
     """Parse callback data based on provider"""
-    import json
-    
     try:
         data = json.loads(body.decode('utf-8'))
         
         if provider_name == "zarinpal":
-            return parse_zarinpal_callback(data)
+            parsed = parse_zarinpal_callback(data)
         elif provider_name == "payping":
-            return parse_payping_callback(data)
+            parsed = parse_payping_callback(data)
         elif provider_name == "idpay":
-            return parse_idpay_callback(data)
+            parsed = parse_idpay_callback(data)
         elif provider_name == "parsijoo":
-            return parse_parsijoo_callback(data)
+            parsed = parse_parsijoo_callback(data)
         else:
             # Generic callback parsing
-            return {
+            parsed = {
                 "status": data.get("status", "unknown"),
                 "reference_id": data.get("reference_id") or data.get("order_id"),
                 "transaction_id": data.get("transaction_id") or data.get("ref_id"),
                 "amount": data.get("amount"),
                 "error_message": data.get("error_message")
             }
+        
+        # Providers that sign their callbacks send the HMAC in a header
+        signature = headers.get("x-signature")
+        if signature:
+            parsed["signature"] = signature
+        return parsed
     except Exception as e:
         return None
 
@@ -287,47 +762,235 @@ def parse_parsijoo_callback(data: Dict[str, Any]) -> Dict[str, Any]:
         "error_message": data.get("message")
     }
 
-def verify_callback_signature(provider_name: str, body: bytes, signature: str) -> bool:
-    """Verify callback signature"""
-    # In a real implementation, you would verify the signature
-    # For now, return True (implement proper verification for production)
-    return True
+# Kept under its old name for existing callers
+verify_callback_signature = verify_webhook
 
 async def log_payment_webhook(
     db: AsyncSession,
     provider_name: str,
     event_type: str,
-    payload: Dict[str, Any]
+    payload: Dict[str, Any],
+    signature: Optional[str] = None
 ) -> PaymentWebhook:
     """Log payment webhook for audit trail"""
-    webhook = PaymentWebhook(
-        provider_name=provider_name,
-        event_type=event_type,
-        payload=payload
-    )
-    db.add(webhook)
+    webhook = await _insert_returning(db, PaymentWebhook, {
+        "provider_name": provider_name,
+        "event_type": event_type,
+        "payload": payload,
+        "signature": signature
+    })
     await db.commit()
-    await db.refresh(webhook)
     return webhook
 
+# -----------------------------
+# Buffered Webhook Audit Log
+# -----------------------------
+WEBHOOK_BATCH_SIZE = 200
+WEBHOOK_FLUSH_INTERVAL = 0.1  # seconds
+WEBHOOK_QUEUE_MAXSIZE = 10000
+
+_webhook_queue: Optional[asyncio.Queue] = None
+_webhook_flusher_task: Optional[asyncio.Task] = None
+
+def enqueue_payment_webhook(
+    provider_name: str,
+    event_type: str,
+    payload: Dict[str, Any],
+    signature: Optional[str] = None
+) -> bool:
+    """Buffer a webhook audit row for the background flusher.
+
+    Returns False when the flusher isn't running or the buffer is full, so the
+    caller can fall back to `log_payment_webhook`.
+    """
+    if _webhook_queue is None:
+        return False
+    try:
+        _webhook_queue.put_nowait({
+            "provider_name": provider_name,
+            "event_type": event_type,
+            "payload": payload,
+            "signature": signature,
+        })
+    except asyncio.QueueFull:
+        return False
+    return True
+
+async def flush_payment_webhooks(db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    """Insert buffered webhook rows with a single multi-row INSERT"""
+    if not rows:
+        return 0
+    await db.execute(insert(PaymentWebhook), rows)
+    await db.commit()
+    return len(rows)
+
+async def _drain_webhook_batch(queue: asyncio.Queue) -> List[Dict[str, Any]]:
+    """Wait for one row, then collect up to a full batch or until the interval elapses"""
+    rows = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + WEBHOOK_FLUSH_INTERVAL
+    while len(rows) < WEBHOOK_BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            rows.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return rows
+
+async def _write_webhook_batch(rows: List[Dict[str, Any]]) -> None:
+    from app.db.session import AsyncSessionLocal
+    try:
+        pool = get_pg_pool_nowait()
+        if pool is not None:
+            # asyncpg pipelines executemany in a single round trip, no ORM unit of work
+            async with pool.acquire() as conn:
+                await conn.executemany(_WEBHOOK_INSERT_SQL, [
+                    (row["provider_name"], row["event_type"], row["payload"], row.get("signature"))
+                    for row in rows
+                ])
+            return
+        async with AsyncSessionLocal() as db:
+            await flush_payment_webhooks(db, rows)
+    except Exception as e:
+        logger.error("Failed to flush %d payment webhooks: %s", len(rows), e)
+
+async def webhook_flusher(queue: asyncio.Queue) -> None:
+    """Background task draining the webhook buffer into the database"""
+    while True:
+        rows = await _drain_webhook_batch(queue)
+        # Shielded so a shutdown mid-write doesn't drop an already-drained batch
+        await asyncio.shield(_write_webhook_batch(rows))
+
+def start_webhook_flusher() -> None:
+    """Create the webhook buffer and spawn its flusher on the running loop"""
+    global _webhook_queue, _webhook_flusher_task
+    if _webhook_flusher_task is not None and not _webhook_flusher_task.done():
+        return
+    _webhook_queue = asyncio.Queue(maxsize=WEBHOOK_QUEUE_MAXSIZE)
+    _webhook_flusher_task = asyncio.create_task(webhook_flusher(_webhook_queue))
+
+async def stop_webhook_flusher() -> None:
+    """Stop the flusher and write out anything still buffered"""
+    global _webhook_queue, _webhook_flusher_task
+    queue, task = _webhook_queue, _webhook_flusher_task
+    _webhook_queue, _webhook_flusher_task = None, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if queue is not None:
+        rows = []
+        while not queue.empty():
+            rows.append(queue.get_nowait())
+        if rows:
+            await _write_webhook_batch(rows)
+
+# -----------------------------
+# Webhook Partition Retention
+# -----------------------------
+WEBHOOK_RETENTION_MONTHS = int(os.getenv("PAYMENT_WEBHOOK_RETENTION_MONTHS", "6"))
+WEBHOOK_MAINTENANCE_INTERVAL = 24 * 60 * 60  # seconds
+
+_webhook_maintenance_task: Optional[asyncio.Task] = None
+
+def _add_months(day: date, months: int) -> date:
+    """First day of the month ``months`` away from ``day``'s month"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def webhook_partition_name(month_start: date) -> str:
+    return f"payment_webhooks_p{month_start:%Y%m}"
+
+def expired_webhook_partitions(partition_names: List[str], today: date, retention_months: int) -> List[str]:
+    """Monthly partitions whose whole range is older than the retention window"""
+    cutoff = webhook_partition_name(_add_months(today, -retention_months))
+    return sorted(
+        name for name in partition_names
+        if len(name) == len(cutoff) and name.startswith("payment_webhooks_p") and name < cutoff
+    )
+
+async def maintain_webhook_partitions(db: AsyncSession, today: Optional[date] = None) -> List[str]:
+    """Create this and next month's payment_webhooks partitions and drop expired ones.
+
+    A no-op when the table isn't partitioned (e.g. created via ``create_all``).
+    Returns the names of the dropped partitions.
+    """
+    today = today or datetime.utcnow().date()
+    partitioned = await db.scalar(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'payment_webhooks'::regclass"
+    ))
+    if not partitioned:
+        return []
+    
+    for offset in (0, 1):
+        month_start = _add_months(today, offset)
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {webhook_partition_name(month_start)} "
+            f"PARTITION OF payment_webhooks "
+            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{_add_months(month_start, 1).isoformat()}')"
+        ))
+    
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'payment_webhooks'::regclass"
+    ))
+    expired = expired_webhook_partitions(result.scalars().all(), today, WEBHOOK_RETENTION_MONTHS)
+    for name in expired:
+        # Detaching is a catalog-only change; the drop then frees the files at once
+        await db.execute(text(f"ALTER TABLE payment_webhooks DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+    await db.commit()
+    return expired
+
+async def webhook_partition_maintainer() -> None:
+    """Background task running partition maintenance once a day"""
+    from app.db.session import AsyncSessionLocal
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                dropped = await maintain_webhook_partitions(db)
+            if dropped:
+                logger.info("Dropped expired payment webhook partitions: %s", ", ".join(dropped))
+        except Exception as e:
+            logger.error("Payment webhook partition maintenance failed: %s", e)
+        await asyncio.sleep(WEBHOOK_MAINTENANCE_INTERVAL)
+
+def start_webhook_partition_maintainer() -> None:
+    global _webhook_maintenance_task
+    if _webhook_maintenance_task is not None and not _webhook_maintenance_task.done():
+        return
+    _webhook_maintenance_task = asyncio.create_task(webhook_partition_maintainer())
+
+async def stop_webhook_partition_maintainer() -> None:
+    global _webhook_maintenance_task
+    task, _webhook_maintenance_task = _webhook_maintenance_task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
 # -----------------------------
 # Payment Refund Operations
 # -----------------------------
 async def create_payment_refund(
     db: AsyncSession,
     payment_id: int,
-    amount: float,
+    amount: Decimal,
     reason: Optional[str] = None
 ) -> PaymentRefund:
     """Create a payment refund"""
-    refund = PaymentRefund(
-        payment_id=payment_id,
-        amount=amount,
-        reason=reason
-    )
-    db.add(refund)
+    refund = await _insert_returning(db, PaymentRefund, {
+        "payment_id": payment_id,
+        "amount": amount,
+        "reason": reason
+    })
     await db.commit()
-    await db.refresh(refund)
     return refund
 
 async def update_refund_status(
@@ -339,7 +1002,7 @@ async def update_refund_status(
     """Update refund status"""
     update_data = {
         "status": status,
-        "processed_at": datetime.utcnow() if status == PaymentStatus.COMPLETED else None
+        "processed_at": datetime.utcnow() if status is _COMPLETED else None
     }
     
     if provider_refund_id:
@@ -369,44 +1032,41 @@ async def get_payment_analytics(
     start_date: datetime,
     end_date: datetime
 ) -> Dict[str, Any]:
-    """Get payment analytics for admin dashboard"""
-    
-    # Get payments in date range
+    """Get payment analytics for admin dashboard (from the daily rollup, day granularity)"""
     result = await db.execute(
-        select(Payment)
-        .where(Payment.created_at >= start_date)
-        .where(Payment.created_at <= end_date)
+        select(
+            PaymentDailyStats.provider,
+            PaymentDailyStats.payment_type,
+            func.sum(PaymentDailyStats.count),
+            func.sum(PaymentDailyStats.completed_count),
+            func.sum(PaymentDailyStats.failed_count),
+            func.sum(PaymentDailyStats.amount_sum)
+        )
+        .where(PaymentDailyStats.date >= start_date.date())
+        .where(PaymentDailyStats.date <= end_date.date())
+        .group_by(PaymentDailyStats.provider, PaymentDailyStats.payment_type)
     )
-    payments = result.scalars().all()
-    
-    # Calculate metrics
-    total_payments = len(payments)
-    total_amount = sum(p.amount for p in payments if p.status == PaymentStatus.COMPLETED)
-    successful_payments = len([p for p in payments if p.status == PaymentStatus.COMPLETED])
-    failed_payments = len([p for p in payments if p.status == PaymentStatus.FAILED])
     
-    # Group by payment type
+    total_payments = 0
+    total_amount = 0
+    successful_payments = 0
+    failed_payments = 0
     type_stats = {}
-    for payment in payments:
-        payment_type = payment.payment_type
-        if payment_type not in type_stats:
-            type_stats[payment_type] = {"count": 0, "amount": 0}
-        
-        type_stats[payment_type]["count"] += 1
-        if payment.status == PaymentStatus.COMPLETED:
-            type_stats[payment_type]["amount"] += payment.amount
-    
-    # Group by provider
     provider_stats = {}
-    for payment in payments:
-        provider = payment.payment_method
-        if provider not in provider_stats:
-            provider_stats[provider] = {"count": 0, "amount": 0, "successful": 0}
+    for provider, payment_type, count, completed, failed, amount in result.all():
+        total_payments += count
+        total_amount += amount
+        successful_payments += completed
+        failed_payments += failed
+        
+        type_entry = type_stats.setdefault(payment_type, {"count": 0, "amount": 0})
+        type_entry["count"] += count
+        type_entry["amount"] += amount
         
-        provider_stats[provider]["count"] += 1
-        if payment.status == PaymentStatus.COMPLETED:
-            provider_stats[provider]["amount"] += payment.amount
-            provider_stats[provider]["successful"] += 1
+        provider_entry = provider_stats.setdefault(provider, {"count": 0, "amount": 0, "successful": 0})
+        provider_entry["count"] += count
+        provider_entry["amount"] += amount
+        provider_entry["successful"] += completed
     
     return {
         "total_payments": total_payments,
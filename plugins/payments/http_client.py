@@ -0,0 +1,33 @@
+"""
+Shared HTTP client for payment provider APIs
+One pooled AsyncClient keeps TCP/TLS connections to the gateways warm
+"""
+from typing import Optional
+import importlib.util
+
+try:
+    import httpx
+except Exception:
+    httpx = None
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_shared_client: Optional["httpx.AsyncClient"] = None
+
+def get_shared_client() -> "httpx.AsyncClient":
+    """Return the process-wide provider client, creating it on first use"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+            http2=_HTTP2_AVAILABLE
+        )
+    return _shared_client
+
+async def close_shared_client() -> None:
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
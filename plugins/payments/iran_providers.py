@@ -2,11 +2,16 @@
 Iran Payment Providers Integration
 Supports major Iranian payment gateways and banks
 """
+import asyncio
+import functools
 import hashlib
 import hmac
 import json
 import os
-from typing import Dict, Any, Optional, Tuple
+import orjson
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 from datetime import datetime
 from urllib.parse import urlencode
 import logging
@@ -16,17 +21,59 @@ try:
 except Exception:
     httpx = None
 
+from .http_client import get_shared_client
+
 logger = logging.getLogger(__name__)
 
+# Provider payloads go through orjson both ways instead of httpx's stdlib json
+_loads = orjson.loads
+_dumps = orjson.dumps
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Gateways answer with small JSON documents; anything bigger is treated as an error
+MAX_PROVIDER_RESPONSE_BYTES = 1024 * 1024
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+def _section(data: Dict[str, Any], key: str) -> Mapping[str, Any]:
+    """Nested object of a provider reply, or an empty mapping.
+
+    ZarinPal sends ``"data": []`` on errors and ``"errors": []`` on success,
+    so chained ``.get(key, {})`` calls can't be trusted.
+    """
+    value = data.get(key)
+    return value if isinstance(value, dict) else _EMPTY
+
 class BaseIranPaymentProvider:
     """Base class for Iran payment providers"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
         self.config = config
         self.api_key = config.get("api_key")
         self.merchant_id = config.get("merchant_id")
         self.callback_url = config.get("callback_url")
         self.is_test_mode = config.get("is_test_mode", True)
+        self._client = client
+    
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Injected client, or the shared pooled one (re-created if it was closed)"""
+        return self._client or get_shared_client()
+    
+    async def _post_json(self, url: str, payload: Dict[str, Any],
+                         headers: Mapping[str, str] = _JSON_HEADERS) -> Dict[str, Any]:
+        """POST a JSON payload and decode the JSON reply.
+
+        The body is streamed into one bytearray and decoded straight from bytes
+        (no intermediate str); replies over MAX_PROVIDER_RESPONSE_BYTES are
+        rejected instead of being buffered whole.
+        """
+        async with self.client.stream("POST", url, content=_dumps(payload), headers=headers) as response:
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > MAX_PROVIDER_RESPONSE_BYTES:
+                    raise ValueError(f"Provider response from {url} exceeds {MAX_PROVIDER_RESPONSE_BYTES} bytes")
+        return _loads(body)
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
@@ -44,10 +91,16 @@ class BaseIranPaymentProvider:
 class ZarinPalProvider(BaseIranPaymentProvider):
     """ZarinPal payment gateway integration"""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.base_url = "https://api.zarinpal.com/pg/v4/pay" if not self.is_test_mode else "https://sandbox.zarinpal.com/pg/v4/pay"
-        self.verify_url = "https://api.zarinpal.com/pg/v4/payment/verify.json" if not self.is_test_mode else "https://sandbox.zarinpal.com/pg/v4/payment/verify.json"
+    # is_test_mode -> (pay URL, verify URL)
+    _URLS = MappingProxyType({
+        True: ("https://sandbox.zarinpal.com/pg/v4/pay", "https://sandbox.zarinpal.com/pg/v4/payment/verify.json"),
+        False: ("https://api.zarinpal.com/pg/v4/pay", "https://api.zarinpal.com/pg/v4/payment/verify.json")
+    })
+    _START_PAY_PREFIX = "https://www.zarinpal.com/pg/StartPay/"
+    
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
+        super().__init__(config, client)
+        self.base_url, self.verify_url = self._URLS[bool(self.is_test_mode)]
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
@@ -64,29 +117,28 @@ class ZarinPalProvider(BaseIranPaymentProvider):
                 }
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(self.base_url, json=payload)
-                data = response.json()
+            data = await self._post_json(self.base_url, payload)
+            
+            result = _section(data, "data")
+            if result.get("code") == 100:
+                authority = result["authority"]
+                payment_url = self._START_PAY_PREFIX + authority
+                
+                return {
+                    "success": True,
+                    "authority": authority,
+                    "payment_url": payment_url,
+                    "provider_response": data
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": _section(data, "errors").get("message", "Unknown error"),
+                    "provider_response": data
+                }
                 
-                if data.get("data", {}).get("code") == 100:
-                    authority = data["data"]["authority"]
-                    payment_url = f"https://www.zarinpal.com/pg/StartPay/{authority}"
-                    
-                    return {
-                        "success": True,
-                        "authority": authority,
-                        "payment_url": payment_url,
-                        "provider_response": data
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": data.get("errors", {}).get("message", "Unknown error"),
-                        "provider_response": data
-                    }
-                    
         except Exception as e:
-            logger.error(f"ZarinPal payment creation error: {e}")
+            logger.error("ZarinPal payment creation error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -102,26 +154,25 @@ class ZarinPalProvider(BaseIranPaymentProvider):
                 "amount": int(amount)
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(self.verify_url, json=payload)
-                data = response.json()
+            data = await self._post_json(self.verify_url, payload)
+            
+            result = _section(data, "data")
+            if result.get("code") == 100:
+                return {
+                    "success": True,
+                    "transaction_id": result["ref_id"],
+                    "amount": result["amount"],
+                    "provider_response": data
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": _section(data, "errors").get("message", "Verification failed"),
+                    "provider_response": data
+                }
                 
-                if data.get("data", {}).get("code") == 100:
-                    return {
-                        "success": True,
-                        "transaction_id": data["data"]["ref_id"],
-                        "amount": data["data"]["amount"],
-                        "provider_response": data
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": data.get("errors", {}).get("message", "Verification failed"),
-                        "provider_response": data
-                    }
-                    
         except Exception as e:
-            logger.error(f"ZarinPal payment verification error: {e}")
+            logger.error("ZarinPal payment verification error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -131,26 +182,32 @@ class ZarinPalProvider(BaseIranPaymentProvider):
 class MellatProvider(BaseIranPaymentProvider):
     """Mellat Bank payment gateway integration"""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
+    _URLS = MappingProxyType({
+        True: "https://banktest.ir/gateway/mellat",
+        False: "https://bpm.shaparak.ir/pgwchannel/services/pgw"
+    })
+    
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
+        super().__init__(config, client)
         self.terminal_id = config.get("terminal_id")
         self.username = config.get("username")
         self.password = config.get("password")
-        self.base_url = "https://bpm.shaparak.ir/pgwchannel/services/pgw" if not self.is_test_mode else "https://banktest.ir/gateway/mellat"
+        self.base_url = self._URLS[bool(self.is_test_mode)]
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
         """Create Mellat payment request"""
         try:
             # Mellat uses SOAP API, simplified implementation
+            now = datetime.now()
             payload = {
                 "terminalId": self.terminal_id,
                 "userName": self.username,
                 "userPassword": self.password,
                 "orderId": reference_id,
                 "amount": int(amount),
-                "localDate": datetime.now().strftime("%Y%m%d"),
-                "localTime": datetime.now().strftime("%H%M%S"),
+                "localDate": f"{now.year:04d}{now.month:02d}{now.day:02d}",
+                "localTime": f"{now.hour:02d}{now.minute:02d}{now.second:02d}",
                 "additionalData": description,
                 "callBackUrl": self.callback_url,
                 "payerId": user_phone or "0"
@@ -166,7 +223,7 @@ class MellatProvider(BaseIranPaymentProvider):
             }
             
         except Exception as e:
-            logger.error(f"Mellat payment creation error: {e}")
+            logger.error("Mellat payment creation error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -176,19 +233,25 @@ class MellatProvider(BaseIranPaymentProvider):
 class ParsijooProvider(BaseIranPaymentProvider):
     """Parsijoo payment gateway integration"""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.base_url = "https://pay.parsijoo.ir/api/v1" if not self.is_test_mode else "https://sandbox.parsijoo.ir/api/v1"
+    _URLS = MappingProxyType({
+        True: "https://sandbox.parsijoo.ir/api/v1",
+        False: "https://pay.parsijoo.ir/api/v1"
+    })
+    
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
+        super().__init__(config, client)
+        self.base_url = self._URLS[bool(self.is_test_mode)]
+        # Built once per (cached) instance instead of on every request
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self._create_url = f"{self.base_url}/payment/request"
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
         """Create Parsijoo payment request"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "amount": int(amount),
                 "description": description,
@@ -197,30 +260,24 @@ class ParsijooProvider(BaseIranPaymentProvider):
                 "mobile": user_phone
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{self.base_url}/payment/request",
-                    json=payload,
-                    headers=headers
-                )
-                data = response.json()
+            data = await self._post_json(self._create_url, payload, self._headers)
+            
+            if data.get("status") == "success":
+                return {
+                    "success": True,
+                    "payment_id": data["data"]["payment_id"],
+                    "payment_url": data["data"]["payment_url"],
+                    "provider_response": data
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": data.get("message", "Payment creation failed"),
+                    "provider_response": data
+                }
                 
-                if data.get("status") == "success":
-                    return {
-                        "success": True,
-                        "payment_id": data["data"]["payment_id"],
-                        "payment_url": data["data"]["payment_url"],
-                        "provider_response": data
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": data.get("message", "Payment creation failed"),
-                        "provider_response": data
-                    }
-                    
         except Exception as e:
-            logger.error(f"Parsijoo payment creation error: {e}")
+            logger.error("Parsijoo payment creation error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -230,19 +287,24 @@ class ParsijooProvider(BaseIranPaymentProvider):
 class PaypingProvider(BaseIranPaymentProvider):
     """Payping payment gateway integration"""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.base_url = "https://api.payping.ir/v2" if not self.is_test_mode else "https://sandbox.payping.ir/v2"
+    _URLS = MappingProxyType({
+        True: "https://sandbox.payping.ir/v2",
+        False: "https://api.payping.ir/v2"
+    })
+    
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
+        super().__init__(config, client)
+        self.base_url = self._URLS[bool(self.is_test_mode)]
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self._create_url = f"{self.base_url}/pay"
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
         """Create Payping payment request"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "amount": int(amount),
                 "returnUrl": self.callback_url,
@@ -251,31 +313,25 @@ class PaypingProvider(BaseIranPaymentProvider):
                 "payerIdentity": user_phone
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{self.base_url}/pay",
-                    json=payload,
-                    headers=headers
-                )
-                data = response.json()
+            data = await self._post_json(self._create_url, payload, self._headers)
+            
+            if "code" in data:
+                payment_url = f"https://api.payping.ir/v2/pay/gotoipg/{data['code']}"
+                return {
+                    "success": True,
+                    "code": data["code"],
+                    "payment_url": payment_url,
+                    "provider_response": data
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": data.get("message", "Payment creation failed"),
+                    "provider_response": data
+                }
                 
-                if "code" in data:
-                    payment_url = f"https://api.payping.ir/v2/pay/gotoipg/{data['code']}"
-                    return {
-                        "success": True,
-                        "code": data["code"],
-                        "payment_url": payment_url,
-                        "provider_response": data
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": data.get("message", "Payment creation failed"),
-                        "provider_response": data
-                    }
-                    
         except Exception as e:
-            logger.error(f"Payping payment creation error: {e}")
+            logger.error("Payping payment creation error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
@@ -285,20 +341,23 @@ class PaypingProvider(BaseIranPaymentProvider):
 class IDPayProvider(BaseIranPaymentProvider):
     """IDPay payment gateway integration"""
     
-    def __init__(self, config: Dict[str, Any]):
-        super().__init__(config)
-        self.base_url = "https://api.idpay.ir/v1.1" if not self.is_test_mode else "https://api.idpay.ir/v1.1"
+    # IDPay has no separate sandbox host; test mode is the X-SANDBOX header
+    BASE_URL = "https://api.idpay.ir/v1.1"
+    
+    def __init__(self, config: Dict[str, Any], client: Optional["httpx.AsyncClient"] = None):
+        super().__init__(config, client)
+        self.base_url = self.BASE_URL
+        self._headers = {
+            "X-API-KEY": self.api_key,
+            "X-SANDBOX": "1" if self.is_test_mode else "0",
+            "Content-Type": "application/json"
+        }
+        self._create_url = f"{self.base_url}/payment"
         
     async def create_payment(self, amount: float, currency: str, description: str, 
                            reference_id: str, user_phone: str = None) -> Dict[str, Any]:
         """Create IDPay payment request"""
         try:
-            headers = {
-                "X-API-KEY": self.api_key,
-                "X-SANDBOX": "1" if self.is_test_mode else "0",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "order_id": reference_id,
                 "amount": int(amount),
@@ -309,134 +368,219 @@ class IDPayProvider(BaseIranPaymentProvider):
                 "callback": self.callback_url
             }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{self.base_url}/payment",
-                    json=payload,
-                    headers=headers
-                )
-                data = response.json()
+            data = await self._post_json(self._create_url, payload, self._headers)
+            
+            if data.get("status") == 200:
+                return {
+                    "success": True,
+                    "id": data["id"],
+                    "link": data["link"],
+                    "provider_response": data
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": data.get("error_message", "Payment creation failed"),
+                    "provider_response": data
+                }
                 
-                if data.get("status") == 200:
-                    return {
-                        "success": True,
-                        "id": data["id"],
-                        "link": data["link"],
-                        "provider_response": data
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": data.get("error_message", "Payment creation failed"),
-                        "provider_response": data
-                    }
-                    
         except Exception as e:
-            logger.error(f"IDPay payment creation error: {e}")
+            logger.error("IDPay payment creation error: %s", e)
             return {
                 "success": False,
                 "error": str(e),
                 "provider_response": None
             }
 
+# Webhook signature verification
+# Per-provider webhook signing secrets, read once at import
+PROVIDER_SECRETS: Dict[str, bytes] = {
+    name: os.getenv(f"{name.upper()}_WEBHOOK_SECRET", "").encode()
+    for name in ("zarinpal", "mellat", "parsijoo", "payping", "idpay", "next_pay")
+}
+
+def verify_webhook(provider_name: str, body: bytes, signature_hex: Optional[str]) -> bool:
+    """Check a hex HMAC-SHA256 of the raw request body in constant time.
+
+    ``body`` must be the exact bytes received (``await request.body()``), not a
+    re-serialized payload. Providers without a configured secret never verify.
+    """
+    secret = PROVIDER_SECRETS.get(provider_name)
+    if not secret or not signature_hex:
+        return False
+    expected = hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_hex.lower())
+
 # Payment provider factory
+def _provider_class(name: str) -> type:
+    """Resolve a lower-cased provider name to its class"""
+    match name:
+        case "zarinpal":
+            return ZarinPalProvider
+        case "mellat":
+            return MellatProvider
+        case "parsijoo":
+            return ParsijooProvider
+        case "payping":
+            return PaypingProvider
+        case "idpay":
+            return IDPayProvider
+        case _:
+            raise ValueError(f"Unsupported payment provider: {name}")
+
+@functools.lru_cache(maxsize=64)
+def _build_provider(provider_name: str, cfg_key: bytes) -> BaseIranPaymentProvider:
+    return _provider_class(provider_name)(_loads(cfg_key))
+
 class IranPaymentFactory:
     """Factory for creating Iran payment providers"""
     
     @staticmethod
-    def create_provider(provider_name: str, config: Dict[str, Any]) -> BaseIranPaymentProvider:
-        """Create payment provider instance"""
-        providers = {
-            "zarinpal": ZarinPalProvider,
-            "mellat": MellatProvider,
-            "parsijoo": ParsijooProvider,
-            "payping": PaypingProvider,
-            "idpay": IDPayProvider
-        }
+    def create_provider(
+        provider_name: str,
+        config: Dict[str, Any],
+        client: Optional["httpx.AsyncClient"] = None
+    ) -> BaseIranPaymentProvider:
+        """Create payment provider instance.
+
+        Providers are stateless apart from their config, so instances are reused
+        per (provider, config). The cache key is the config's canonical JSON, so
+        nested values from the payment_providers row still hit; configs that
+        aren't JSON-serializable get a fresh instance.
+        Without ``client`` they use the shared pooled client (app.state.payments_http);
+        an explicitly injected client always gets its own instance.
+        """
+        name = provider_name.lower()
+        provider_class = _provider_class(name)
         
-        provider_class = providers.get(provider_name.lower())
-        if not provider_class:
-            raise ValueError(f"Unsupported payment provider: {provider_name}")
-            
-        return provider_class(config)
+        if client is not None:
+            return provider_class(config, client)
+        try:
+            cfg_key = orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return provider_class(config)
+        return _build_provider(name, cfg_key)
+
+# Concurrent provider calls
+BULK_CONCURRENCY = 32  # stays below the shared client's max_connections (200)
+
+@dataclass(frozen=True)
+class ProviderPaymentRequest:
+    """One provider create_payment call for create_payments_bulk"""
+    provider: str
+    config: Dict[str, Any]
+    amount: float
+    currency: str
+    description: str
+    reference_id: str
+    user_phone: Optional[str] = None
+
+async def create_payments_bulk(requests: List[ProviderPaymentRequest]) -> List[Dict[str, Any]]:
+    """Create payments across providers concurrently over the shared HTTP pool.
+
+    Results are returned in request order; providers already turn their own
+    failures into ``{"success": False, ...}`` so one bad gateway doesn't sink the batch.
+    """
+    sem = asyncio.Semaphore(BULK_CONCURRENCY)
+    
+    async def one(req: ProviderPaymentRequest) -> Dict[str, Any]:
+        async with sem:
+            provider = IranPaymentFactory.create_provider(req.provider, req.config)
+            return await provider.create_payment(
+                amount=req.amount,
+                currency=req.currency,
+                description=req.description,
+                reference_id=req.reference_id,
+                user_phone=req.user_phone
+            )
+    
+    return await asyncio.gather(*(one(req) for req in requests))
 
 # Utility functions
-async def get_available_providers() -> Dict[str, Dict[str, Any]]:
+# Provider catalogue never changes at runtime, so it is built once and frozen
+_PROVIDERS_INFO: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "zarinpal": MappingProxyType({
+        "name": "ZarinPal",
+        "display_name": "زرین‌پال",
+        "description": "Most popular Iranian payment gateway",
+        "supports_irr": True,
+        "supports_usd": False,
+        "supports_eur": False,
+        "transaction_fee_percentage": 1.0,
+        "minimum_amount": 1000,
+        "logo_url": "/static/images/payment/zarinpal.png"
+    }),
+    "mellat": MappingProxyType({
+        "name": "Mellat Bank",
+        "display_name": "بانک ملت",
+        "description": "Official Mellat Bank payment gateway",
+        "supports_irr": True,
+        "supports_usd": False,
+        "supports_eur": False,
+        "transaction_fee_percentage": 0.5,
+        "minimum_amount": 1000,
+        "logo_url": "/static/images/payment/mellat.png"
+    }),
+    "parsijoo": MappingProxyType({
+        "name": "Parsijoo",
+        "display_name": "پارس‌ایجو",
+        "description": "Fast and reliable payment gateway",
+        "supports_irr": True,
+        "supports_usd": False,
+        "supports_eur": False,
+        "transaction_fee_percentage": 1.5,
+        "minimum_amount": 1000,
+        "logo_url": "/static/images/payment/parsijoo.png"
+    }),
+    "payping": MappingProxyType({
+        "name": "Payping",
+        "display_name": "پی‌پینگ",
+        "description": "Modern payment gateway with good UX",
+        "supports_irr": True,
+        "supports_usd": False,
+        "supports_eur": False,
+        "transaction_fee_percentage": 1.0,
+        "minimum_amount": 1000,
+        "logo_url": "/static/images/payment/payping.png"
+    }),
+    "idpay": MappingProxyType({
+        "name": "IDPay",
+        "display_name": "آیدی‌پی",
+        "description": "Secure payment gateway with fraud protection",
+        "supports_irr": True,
+        "supports_usd": False,
+        "supports_eur": False,
+        "transaction_fee_percentage": 1.2,
+        "minimum_amount": 1000,
+        "logo_url": "/static/images/payment/idpay.png"
+    })
+})
+
+# Fees in basis points (100 bps = 1%) so fee math stays in integer Rials
+_FEE_BPS: Dict[str, int] = {
+    name: round(info["transaction_fee_percentage"] * 100) for name, info in _PROVIDERS_INFO.items()
+}
+
+async def get_available_providers() -> Mapping[str, Mapping[str, Any]]:
     """Get list of available payment providers with their configurations"""
-    return {
-        "zarinpal": {
-            "name": "ZarinPal",
-            "display_name": "زرین‌پال",
-            "description": "Most popular Iranian payment gateway",
-            "supports_irr": True,
-            "supports_usd": False,
-            "supports_eur": False,
-            "transaction_fee_percentage": 1.0,
-            "minimum_amount": 1000,
-            "logo_url": "/static/images/payment/zarinpal.png"
-        },
-        "mellat": {
-            "name": "Mellat Bank",
-            "display_name": "بانک ملت",
-            "description": "Official Mellat Bank payment gateway",
-            "supports_irr": True,
-            "supports_usd": False,
-            "supports_eur": False,
-            "transaction_fee_percentage": 0.5,
-            "minimum_amount": 1000,
-            "logo_url": "/static/images/payment/mellat.png"
-        },
-        "parsijoo": {
-            "name": "Parsijoo",
-            "display_name": "پارس‌ایجو",
-            "description": "Fast and reliable payment gateway",
-            "supports_irr": True,
-            "supports_usd": False,
-            "supports_eur": False,
-            "transaction_fee_percentage": 1.5,
-            "minimum_amount": 1000,
-            "logo_url": "/static/images/payment/parsijoo.png"
-        },
-        "payping": {
-            "name": "Payping",
-            "display_name": "پی‌پینگ",
-            "description": "Modern payment gateway with good UX",
-            "supports_irr": True,
-            "supports_usd": False,
-            "supports_eur": False,
-            "transaction_fee_percentage": 1.0,
-            "minimum_amount": 1000,
-            "logo_url": "/static/images/payment/payping.png"
-        },
-        "idpay": {
-            "name": "IDPay",
-            "display_name": "آیدی‌پی",
-            "description": "Secure payment gateway with fraud protection",
-            "supports_irr": True,
-            "supports_usd": False,
-            "supports_eur": False,
-            "transaction_fee_percentage": 1.2,
-            "minimum_amount": 1000,
-            "logo_url": "/static/images/payment/idpay.png"
-        }
-    }
+    return _PROVIDERS_INFO
 
-async def calculate_payment_fees(amount: float, provider_name: str) -> Dict[str, float]:
-    """Calculate payment fees for a given amount and provider"""
-    providers = await get_available_providers()
-    provider = providers.get(provider_name.lower())
-    
-    if not provider:
+def calculate_payment_fees(amount: float, provider_name: str) -> Dict[str, Any]:
+    """Calculate payment fees for a given amount and provider.
+
+    Amounts are whole Rials; the fee is rounded down to a whole Rial.
+    """
+    fee_bps = _FEE_BPS.get(provider_name.lower())
+    if fee_bps is None:
         raise ValueError(f"Unknown provider: {provider_name}")
     
-    fee_percentage = provider["transaction_fee_percentage"]
-    fee_amount = (amount * fee_percentage) / 100
+    amount = int(amount)
+    fee_amount = (amount * fee_bps) // 10_000
     
     return {
         "amount": amount,
-        "fee_percentage": fee_percentage,
+        "fee_bps": fee_bps,
+        "fee_percentage": fee_bps / 100,
         "fee_amount": fee_amount,
         "total_amount": amount + fee_amount
     }
-
-
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func, Enum, JSON
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Date, DateTime, func, Enum, JSON, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -40,12 +40,12 @@ class Payment(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(18, 2), nullable=False)
     currency = Column(String, default="IRR")
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     payment_method = Column(Enum(PaymentMethod), nullable=False)
     payment_type = Column(Enum(PaymentType), nullable=False)
-    reference_id = Column(String, nullable=True, index=True)
+    reference_id = Column(String, nullable=True, index=True, unique=True)
     provider_transaction_id = Column(String, nullable=True)
     provider_response = Column(JSON, nullable=True)
     provider_error = Column(String, nullable=True)
@@ -55,6 +55,20 @@ class Payment(Base):
 
     order = relationship("Order", back_populates="payments")
     user = relationship("User")
+    refunds = relationship("PaymentRefund", back_populates="payment")
+
+    __table_args__ = (
+        Index("ix_payments_user_status_created", "user_id", "status", "created_at"),
+        Index("ix_payments_provider_txn", "provider_transaction_id"),
+        # Covers the per-user statistics GROUP BY (index-only scan) and the newest-first
+        # history listing, with status/payment_type filters checked inside the index
+        Index(
+            "ix_payments_user_created_status", "user_id", text("created_at DESC"), "status",
+            postgresql_include=["payment_method", "payment_type", "amount"]
+        ),
+        # Reconciler scan over still-pending payments; Enum columns persist member names
+        Index("ix_payments_pending", "created_at", postgresql_where=text("status = 'PENDING'")),
+    )
 
 
 class PaymentRefund(Base):
@@ -62,14 +76,14 @@ class PaymentRefund(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     payment_id = Column(Integer, ForeignKey("payments.id"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(18, 2), nullable=False)
     reason = Column(String, nullable=True)
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
     provider_refund_id = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
 
-    payment = relationship("Payment")
+    payment = relationship("Payment", back_populates="refunds")
 
 
 class PaymentWebhook(Base):
@@ -86,15 +100,42 @@ class PaymentWebhook(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class PaymentWebhookEvent(Base):
+    """Idempotency ledger: one row per provider event that has been applied"""
+    __tablename__ = "payment_webhook_events"
+
+    id = Column(Integer, primary_key=True)
+    provider = Column(String, nullable=False)
+    external_event_id = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("provider", "external_event_id", name="uq_payment_webhook_events_provider_event"),
+    )
+
+
 class WithdrawalRequest(Base):
     __tablename__ = "withdrawal_requests"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(18, 2), nullable=False)
     currency = Column(String, default="IRR")
     bank_account = Column(JSON, nullable=False)
     status = Column(String, default="pending")
     reason = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PaymentDailyStats(Base):
+    """Incremental per-day rollup read by the admin payment analytics"""
+    __tablename__ = "payment_daily_stats"
+
+    date = Column(Date, primary_key=True)
+    provider = Column(String, primary_key=True)
+    payment_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    failed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    amount_sum = Column(Numeric(18, 2), nullable=False, default=0, server_default="0")
@@ -1,50 +1,25 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer
+from typing import Annotated, Optional, Dict, Any, List
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
 
+# Request models forbid unknown fields; response models are frozen (never mutated after construction)
+
+# Exact money amounts (Numeric(18, 2) columns), still emitted as JSON numbers
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
 # -----------------------------
 # Payment Enums
 # -----------------------------
-class PaymentStatus(str, Enum):
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
-    REFUNDED = "refunded"
-
-class PaymentMethod(str, Enum):
-    # Iran Local Payment Methods
-    ZARINPAL = "zarinpal"
-    MELLAT = "mellat"
-    PARSIJOO = "parsijoo"
-    PAYPING = "payping"
-    IDPAY = "idpay"
-    NEXT_PAY = "next_pay"
-    
-    # International Payment Methods
-    STRIPE = "stripe"
-    PAYPAL = "paypal"
-    
-    # Crypto (Future)
-    BITCOIN = "bitcoin"
-    ETHEREUM = "ethereum"
-    TETHER = "tether"
-
-class PaymentType(str, Enum):
-    WALLET_TOPUP = "wallet_topup"
-    SUBSCRIPTION = "subscription"
-    AD_PAYMENT = "ad_payment"
-    ORDER_PAYMENT = "order_payment"
-    ESCROW_PAYMENT = "escrow_payment"
-    REFUND = "refund"
+# Re-exported from the ORM models so API and database share one definition
+from .models import PaymentStatus, PaymentMethod, PaymentType
 
 # -----------------------------
 # Payment Schemas
 # -----------------------------
 class PaymentBase(BaseModel):
-    amount: float = Field(..., gt=0, description="Payment amount")
+    amount: Money = Field(..., gt=0, description="Payment amount")
     currency: str = Field("IRR", description="Currency code")
     payment_method: PaymentMethod
     payment_type: PaymentType
@@ -54,7 +29,7 @@ class PaymentBase(BaseModel):
 
 class PaymentCreate(PaymentBase):
     user_id: int
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class PaymentUpdate(BaseModel):
     status: Optional[PaymentStatus] = None
@@ -62,7 +37,7 @@ class PaymentUpdate(BaseModel):
     provider_response: Optional[Dict[str, Any]] = None
     provider_error: Optional[str] = None
     completed_at: Optional[datetime] = None
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class PaymentOut(PaymentBase):
     id: int
@@ -75,7 +50,7 @@ class PaymentOut(PaymentBase):
     updated_at: datetime
     completed_at: Optional[datetime] = None
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # -----------------------------
 # Wallet Top-up Schemas
@@ -84,9 +59,11 @@ class WalletTopupRequest(BaseModel):
     amount: float = Field(..., gt=0, description="Top-up amount")
     currency: str = Field("IRR", description="Currency code")
     provider: PaymentMethod = Field(..., description="Payment provider")
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class WalletTopupResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     payment: PaymentOut
     payment_url: str
     authority: Optional[str] = None  # For ZarinPal
@@ -100,7 +77,7 @@ class PaymentVerification(BaseModel):
     payment_id: int
     authority: Optional[str] = None  # For ZarinPal
     transaction_id: Optional[str] = None  # For other providers
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class PaymentCallback(BaseModel):
     provider: str
@@ -116,6 +93,8 @@ class PaymentCallback(BaseModel):
 # Payment Provider Schemas
 # -----------------------------
 class PaymentProviderInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     display_name: str
     description: str
@@ -140,6 +119,8 @@ class PaymentProviderConfig(BaseModel):
 # Payment Statistics Schemas
 # -----------------------------
 class PaymentStatistics(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     total_payments: int
     total_amount: float
     successful_payments: int
@@ -149,6 +130,8 @@ class PaymentStatistics(BaseModel):
     period_days: int
 
 class PaymentProviderStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     provider: str
     count: int
     amount: float
@@ -158,15 +141,15 @@ class PaymentProviderStats(BaseModel):
 # Withdrawal Schemas
 # -----------------------------
 class WithdrawalRequestCreate(BaseModel):
-    amount: float = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     currency: str = Field("IRR")
     bank_account: Dict[str, Any]
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class WithdrawalRequestOut(BaseModel):
     id: int
     user_id: int
-    amount: float
+    amount: Money
     currency: str
     bank_account: Dict[str, Any]
     status: str
@@ -174,28 +157,28 @@ class WithdrawalRequestOut(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # -----------------------------
 # Payment Refund Schemas
 # -----------------------------
 class PaymentRefundRequest(BaseModel):
     payment_id: int
-    amount: float = Field(..., gt=0, description="Refund amount")
+    amount: Money = Field(..., gt=0, description="Refund amount")
     reason: Optional[str] = None
-    model_config = {"extra": "forbid"}
+    model_config = ConfigDict(extra="forbid")
 
 class PaymentRefundOut(BaseModel):
     id: int
     payment_id: int
-    amount: float
+    amount: Money
     reason: Optional[str] = None
     status: PaymentStatus
     provider_refund_id: Optional[str] = None
     created_at: datetime
     processed_at: Optional[datetime] = None
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # -----------------------------
 # Payment Webhook Schemas
@@ -211,18 +194,23 @@ class PaymentWebhookOut(BaseModel):
     error_message: Optional[str] = None
     created_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # -----------------------------
 # Payment Fee Schemas
 # -----------------------------
 class PaymentFeeCalculation(BaseModel):
-    amount: float
+    model_config = ConfigDict(frozen=True)
+
+    amount: int
+    fee_bps: int
     fee_percentage: float
-    fee_amount: float
-    total_amount: float
+    fee_amount: int
+    total_amount: int
 
 class PaymentFeeResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     success: bool
     fees: PaymentFeeCalculation
     provider: str
@@ -251,6 +239,8 @@ class PaymentHistoryRequest(BaseModel):
     provider: Optional[PaymentMethod] = None
 
 class PaymentHistoryResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     payments: List[PaymentOut]
     total: int
     page: int
@@ -30,14 +30,12 @@ class Plugin(PluginBase):
         )
         app.include_router(self.router)
 
-    def register_events(self, app: FastAPI):
-        
-        async def startup():
-            print(f"[{self.slug}] plugin ready with config:", self.config.dict())
-
-        
-        async def shutdown():
-            print(f"[{self.slug}] plugin shutting down")
+    # Driven by the loader from the app lifespan (no deprecated on_event hooks)
+    async def on_startup(self, app: FastAPI):
+        print(f"[{self.slug}] plugin ready with config:", self.config.model_dump())
+
+    async def on_shutdown(self, app: FastAPI):
+        print(f"[{self.slug}] plugin shutting down")
 
     async def init_db(self, engine):
         # Tables are created by Alembic migrations
@@ -1,25 +1,34 @@
+import base64
+import re
+from datetime import datetime
+
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from typing import List, Optional
+from sqlalchemy import DateTime, select, update, delete, func, literal_column, text, tuple_
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from typing import Any, Dict, List, Optional, Tuple
 
 from plugins.products.models import Product
-from plugins.products.schemas import ProductCreate, ProductUpdate
+from plugins.products.schemas import ProductCreate, ProductOut, ProductSort, ProductUpdate
 
 # -----------------------------
 # Create Product
 # -----------------------------
 async def create_product(db: AsyncSession, product: ProductCreate, seller_id: int) -> Product:
-    db_product = Product(**product.dict(), seller_id=seller_id)
+    # Server defaults (id, created_at, updated_at) come back via INSERT ... RETURNING
+    # (eager_defaults on the mapper), so no refresh SELECT is needed
+    db_product = Product(**product.dict(exclude={"seller_id"}), seller_id=seller_id)
     db.add(db_product)
     await db.commit()
-    await db.refresh(db_product)
     return db_product
 
 # -----------------------------
 # Get Product by ID
 # -----------------------------
-async def get_product(db: AsyncSession, product_id: int) -> Optional[Product]:
-    return await db.get(Product, product_id)
+async def get_product(db: AsyncSession, product_id: int, load_seller: bool = False) -> Optional[Product]:
+    # Relationships are never lazy-loaded: ask for the seller or touching it raises
+    options = [joinedload(Product.seller)] if load_seller else [raiseload("*")]
+    return await db.get(Product, product_id, options=options)
 
 # -----------------------------
 # Update Product
@@ -32,7 +41,6 @@ async def update_product(db: AsyncSession, product_id: int, product_data: Produc
         setattr(db_product, key, value)
     db.add(db_product)
     await db.commit()
-    await db.refresh(db_product)
     return db_product
 
 # -----------------------------
@@ -49,11 +57,110 @@ async def delete_product(db: AsyncSession, product_id: int, seller_id: int) -> b
 # -----------------------------
 # List / Search Products
 # -----------------------------
+# Keys are rendered inline (not bound) so the expressions match ix_products_meta_city/_brand
+_META_CITY = Product.custom_metadata.op("->>")(literal_column("'city'"))
+_META_BRAND = Product.custom_metadata.op("->>")(literal_column("'brand'"))
+
+_TSQUERY_WORD = re.compile(r"\w+")
+
+def search_tsquery(terms: List[str]) -> str:
+    """Build a to_tsquery string: each term's words ANDed as prefixes, terms ORed.
+
+    Only word characters survive, so user input can't inject tsquery operators.
+    """
+    alternatives = []
+    for term in terms:
+        words = _TSQUERY_WORD.findall(term.lower())
+        if words:
+            alternatives.append("(" + " & ".join(f"{word}:*" for word in words) + ")")
+    return " | ".join(alternatives)
+
+# Exactly the columns ProductOut renders: list pages select these as plain rows
+# instead of hydrating (and identity-mapping) full Product entities
+LIST_COLUMNS = tuple(getattr(Product, field) for field in ProductOut.model_fields)
+
+# Pages larger than the API allows (internal callers) are streamed in chunks
+STREAM_PAGE_SIZE = 100
+STREAM_CHUNK_SIZE = 200
+
+# OFFSET pages past this are refused; deeper reads must use the keyset cursor
+MAX_OFFSET_PAGE = 100
+
+# Keyed by plain value so both ProductSort members and raw strings look up
+SORT_COLUMNS = {
+    ProductSort.id.value: Product.id,
+    ProductSort.created_at.value: Product.created_at,
+    ProductSort.price.value: Product.price,
+}
+
+def _listing_order(sort_by: str, sort_dir: str, apply_boosts: bool) -> Tuple[str, bool]:
+    """(column, descending) the listing is actually ordered by"""
+    if apply_boosts and sort_by in ("id", "created_at"):
+        # Placeholder: prioritize newer products when boosted
+        return "created_at", True
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by {sort_by!r}")
+    return ProductSort(sort_by).value, sort_dir.lower() == "desc"
+
+def encode_product_cursor(product: Product, sort_by: str, sort_dir: str = "asc", apply_boosts: bool = False) -> str:
+    """Opaque keyset cursor pointing just past ``product`` in this ordering"""
+    column, _ = _listing_order(sort_by, sort_dir, apply_boosts)
+    return base64.urlsafe_b64encode(orjson.dumps([getattr(product, column), product.id])).decode()
+
+def _decode_product_cursor(cursor: str, column: str) -> Tuple[Any, int]:
+    try:
+        value, last_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if value is not None and isinstance(SORT_COLUMNS[column].type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(last_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _filter_products(
+    query,
+    search: Optional[str] = None,
+    guild_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    city: Optional[str] = None,
+    brand: Optional[str] = None,
+    synonyms: Optional[list[str]] = None,
+    status_in: Optional[Tuple[str, ...]] = None,
+):
+    """Apply the listing filters shared by list_products and count_products.
+
+    Predicates are collected and applied with a single where(): equality first,
+    then ranges, then text search, cheapest and most selective checks leading.
+    """
+    conditions = []
+    if guild_id is not None:
+        conditions.append(Product.guild_id == guild_id)
+    # city and brand stored in custom_metadata JSON (if present)
+    if city is not None:
+        conditions.append(_META_CITY == city)
+    if brand is not None:
+        conditions.append(_META_BRAND == brand)
+    if status_in:
+        conditions.append(Product.status.in_(status_in))
+    if min_price is not None:
+        conditions.append(Product.price >= min_price)
+    if max_price is not None:
+        conditions.append(Product.price <= max_price)
+    if search:
+        tsquery = search_tsquery([search, *(synonyms or [])])
+        if tsquery:
+            # GIN-indexed full-text match; synonyms are OR'd into the same tsquery
+            conditions.append(Product.search_vector.op("@@")(func.to_tsquery("simple", tsquery)))
+        else:
+            # Nothing word-like to search for; substring match (trigram-indexed)
+            conditions.append(Product.name.ilike(f"%{search}%"))
+    return query.where(*conditions) if conditions else query
+
 async def list_products(
     db: AsyncSession,
     page: int = 1,
     page_size: int = 10,
-    sort_by: str = "id",
+    sort_by: str = ProductSort.id,
     sort_dir: str = "asc",
     search: Optional[str] = None,
     guild_id: Optional[int] = None,
@@ -63,33 +170,81 @@ async def list_products(
     brand: Optional[str] = None,
     apply_boosts: bool = False,
     synonyms: Optional[list[str]] = None,
-) -> List[Product]:
-    query = select(Product)
-    if search:
-        query = query.where(Product.name.ilike(f"%{search}%"))
-    # naive synonyms: OR search terms
-    if synonyms:
-        for syn in synonyms:
-            query = query.where(Product.name.ilike(f"%{syn}%"))
-    if guild_id is not None:
-        query = query.where(Product.guild_id == guild_id)
-    if min_price is not None:
-        query = query.where(Product.price >= min_price)
-    if max_price is not None:
-        query = query.where(Product.price <= max_price)
-    # city and brand stored in custom_metadata JSON (if present)
-    if city is not None:
-        query = query.where(Product.custom_metadata["city"].as_string() == city)
-    if brand is not None:
-        query = query.where(Product.custom_metadata["brand"].as_string() == brand)
-    if apply_boosts and sort_by in ("id", "created_at"):
-        # Placeholder: prioritize newer products when boosted
-        query = query.order_by(getattr(Product, "created_at").desc())
+    cursor: Optional[str] = None,
+    status_in: Optional[Tuple[str, ...]] = None,
+    columns: Optional[Tuple[Any, ...]] = None,
+    load_seller: bool = False,
+) -> List[Any]:
+    """List products; with ``cursor`` (see encode_product_cursor) ``page`` is
+    ignored and the page starts right after the cursor row (keyset pagination).
+    ``status_in`` restricts the moderation status (e.g. ("approved",) for the public catalog).
+    With ``columns`` (e.g. LIST_COLUMNS) plain rows of those columns are returned
+    instead of Product entities; they must include the sort column and id.
+    Entities never lazy-load relationships (raiseload); pass ``load_seller`` to
+    fetch every row's seller in one extra IN query.
+
+    Never counts: page through with the cursor, and call count_products only
+    where a total is really displayed."""
+    if columns:
+        query = select(*columns)
     else:
-        if sort_dir.lower() == "desc":
-            query = query.order_by(getattr(Product, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Product, sort_by).asc())
-    offset = (page - 1) * page_size
-    result = await db.execute(query.offset(offset).limit(page_size))
-    return result.scalars().all()
\ No newline at end of file
+        query = select(Product).options(selectinload(Product.seller) if load_seller else raiseload("*"))
+    query = _filter_products(
+        query, search, guild_id, min_price, max_price, city, brand, synonyms, status_in
+    )
+    column, descending = _listing_order(sort_by, sort_dir, apply_boosts)
+    sort_col = SORT_COLUMNS[column]
+    # id breaks ties so the keyset order is total
+    keys = (sort_col,) if column == "id" else (sort_col, Product.id)
+    query = query.order_by(*(key.desc() if descending else key.asc() for key in keys))
+    
+    if cursor:
+        value, last_id = _decode_product_cursor(cursor, column)
+        bound = (last_id,) if column == "id" else (value, last_id)
+        row, after = tuple_(*keys), tuple_(*bound)
+        query = query.where(row < after if descending else row > after)
+    else:
+        query = query.offset((page - 1) * page_size)
+    query = query.limit(page_size)
+    if page_size > STREAM_PAGE_SIZE:
+        # Wide internal scans go through a server-side cursor, STREAM_CHUNK_SIZE rows per fetch
+        result = await db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        if not columns:
+            result = result.scalars()
+        return [item async for partition in result.partitions() for item in partition]
+    result = await db.execute(query)
+    return result.all() if columns else result.scalars().all()
+
+async def count_products(db: AsyncSession, **filters) -> int:
+    """Exact number of products matching the list_products filters (a full COUNT)"""
+    query = _filter_products(select(Product.id), **filters)
+    # Count over the filtered FROM only: no ORDER BY, no row payload
+    query = query.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+    return (await db.execute(query)).scalar_one()
+
+_ESTIMATED_ROWS = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :relname")
+
+async def estimate_product_count(db: AsyncSession) -> int:
+    """Planner's row estimate for the whole table: O(1), refreshed by ANALYZE/autovacuum"""
+    result = await db.execute(_ESTIMATED_ROWS, {"relname": Product.__tablename__})
+    # reltuples is -1 for a table that was never analyzed
+    return max(result.scalar_one_or_none() or 0, 0)
+
+# -----------------------------
+# Discovery Sections
+# -----------------------------
+# Constant newest-first queries behind /sections/*: built once at import and run
+# against a shared compiled cache, so they are never rebuilt or recompiled
+SECTION_SIZE = 10
+_COMPILED_CACHE: Dict[Any, Any] = {}
+_CACHED_EXECUTION = {"compiled_cache": _COMPILED_CACHE}
+_SECTION_QUERIES = {
+    "id": select(Product).options(raiseload("*")).order_by(Product.id.desc()).limit(SECTION_SIZE),
+    "created_at": select(Product).options(raiseload("*")).order_by(
+        Product.created_at.desc(), Product.id.desc()
+    ).limit(SECTION_SIZE),
+}
+
+async def list_section_products(db: AsyncSession, sort_by: str = "id") -> List[Product]:
+    result = await db.execute(_SECTION_QUERIES[sort_by], execution_options=_CACHED_EXECUTION)
+    return result.scalars().all()
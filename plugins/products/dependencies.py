@@ -1,24 +1,33 @@
 # plugins/products/dependencies.py
 from fastapi import HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
-from plugins.subscriptions.crud import check_plan_limits
+from app.db.session import get_session
+
+from plugins.subscriptions.crud import get_cached_plan_limits
 from plugins.products.models import Product
 
-async def enforce_product_limit(user_id: int, db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
-    """Ensure the seller/buyer does not exceed subscription product limit."""
-    plan = await check_plan_limits(user_id, db)
-    if not plan:
-        raise HTTPException(status_code=403, detail="No active subscription")
+async def _has_at_least(db: AsyncSession, seller_id: int, limit: int) -> bool:
+    """Whether the seller has ``limit`` or more products.
 
-    # Count products for seller
+    Probes for the limit-th row on ix_products_seller_id instead of counting the
+    seller's whole inventory, so the work is bounded by the limit.
+    """
+    if limit <= 0:
+        return True
     result = await db.execute(
-        select(func.count()).select_from(Product).where(Product.seller_id == user_id)
+        select(Product.id).where(Product.seller_id == seller_id).offset(limit - 1).limit(1)
     )
-    count = result.scalar_one()
+    return result.first() is not None
+
+async def enforce_product_limit(user_id: int, db: AsyncSession = Depends(get_session)):
+    """Ensure the seller/buyer does not exceed subscription product limit."""
+    plan = await get_cached_plan_limits(user_id, db)
+    if not plan:
+        raise HTTPException(status_code=403, detail="No active subscription")
 
-    if plan.max_products is not None and count >= plan.max_products:
+    if plan.max_products is not None and await _has_at_least(db, user_id, plan.max_products):
         raise HTTPException(
             status_code=403,
             detail=f"Product limit reached for your subscription ({plan.max_products})"
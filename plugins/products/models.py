@@ -1,6 +1,7 @@
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, func, JSON
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Computed, Index, Integer, String, Float, Boolean, ForeignKey, DateTime, func, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, relationship, declarative_base
 
 from app.db.base import Base
 
@@ -8,15 +9,41 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
-    seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False, index=True)
     guild_id = Column(Integer, ForeignKey("guilds.id"), nullable=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Float, nullable=False)
     stock = Column(Integer, default=0)
-    custom_metadata = Column(JSON, nullable=True)  # optional extra info
+    custom_metadata = Column(JSONB, nullable=True)  # optional extra info
     status = Column(String, default="pending", nullable=False)  # pending, approved, rejected
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    # Maintained by Postgres from name + description; queried with @@ in list_products.
+    # Deferred: only ever used in WHERE, never loaded with the row
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True),
+        nullable=True,
+    ))
+
     seller = relationship("Seller")
+
+    # Fetch server-side defaults/onupdate values with RETURNING during flush
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # list_products filters city/brand via custom_metadata ->> key
+        Index("ix_products_meta_city", text("(custom_metadata ->> 'city')")),
+        Index("ix_products_meta_brand", text("(custom_metadata ->> 'brand')")),
+        # Ordered range reads for the guild filter / price range / newest-first listings
+        Index("ix_products_guild_created", "guild_id", "created_at"),
+        Index("ix_products_guild_price", "guild_id", "price"),
+        Index("ix_products_created_at", "created_at"),
+        # Public catalog only lists approved products
+        Index("ix_products_status_approved", text("created_at DESC"), postgresql_where=text("status = 'approved'")),
+        # ix_products_name_trgm (gin_trgm_ops) lives in migration 32 only: it needs
+        # the pg_trgm extension, which create_all can't assume
+    )
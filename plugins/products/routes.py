@@ -1,32 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.connections import get_redis
+from app.db.session import get_session
 from typing import List, Optional
 
 
-from plugins.products.schemas import ProductCreate, ProductUpdate, ProductOut
+from plugins.products.schemas import ProductCreate, ProductUpdate, ProductOut, ProductSort
 from plugins.products.crud import (
     create_product,
     get_product,
     update_product,
     delete_product,
     list_products,
+    list_section_products,
+    LIST_COLUMNS,
+    encode_product_cursor,
+    MAX_OFFSET_PAGE,
 )
 from plugins.user.security import get_current_user
 from plugins.user.models import User
 from plugins.products.dependencies import enforce_product_limit
 from app.core.openapi import enhance_endpoint_docs
-from plugins.products.docs import product_docs
-from plugins.search.routes import sync_products as search_sync_products  # reuse sync
+from plugins.products.docs import get_product_docs
+from plugins.search.routes import sync_product as search_sync_product
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# Rows come straight from the database, so list responses are projected onto the
+# ProductOut fields and encoded by orjson without re-validating every item
+_PRODUCT_OUT_FIELDS = tuple(ProductOut.model_fields)
+
+def _product_dicts(items) -> List[dict]:
+    return [{field: getattr(item, field) for field in _PRODUCT_OUT_FIELDS} for item in items]
+
+async def _list_page(db: AsyncSession, **params) -> ORJSONResponse:
+    """list_products plus an X-Next-Cursor header when a further page may exist"""
+    try:
+        items = await list_products(db, columns=LIST_COLUMNS, **params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = ORJSONResponse(_product_dicts(items))
+    if len(items) == params["page_size"]:
+        response.headers["X-Next-Cursor"] = encode_product_cursor(
+            items[-1], params["sort_by"], params["sort_dir"], params["apply_boosts"]
+        )
+    return response
+
 # -----------------------------
 # Public Product List (no seller identity)
 # -----------------------------
 @router.get("/public", response_model=List[ProductOut], operation_id="product_public_list")
 async def public_products_endpoint(
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, le=MAX_OFFSET_PAGE, description="Page number (deprecated for deep pages: use cursor)"),
     page_size: int = Query(10, ge=1, le=100, description="Results per page"),
-    sort_by: str = Query("id", description="Field to sort by"),
+    sort_by: ProductSort = Query(ProductSort.id, description="Field to sort by"),
     sort_dir: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
     search: Optional[str] = Query(None, description="Search term for product name"),
     guild_id: Optional[int] = Query(None, description="Filter by guild id"),
@@ -36,44 +70,79 @@ async def public_products_endpoint(
     brand: Optional[str] = Query(None, description="Filter by brand"),
     boosted: bool = Query(False, description="Apply subscription-based boosts"),
     synonyms: Optional[List[str]] = Query(None, description="Synonyms for search"),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_session),
 ) -> List[ProductOut]:
     """Public catalog: hides seller identity at response layer (schema does not include seller)."""
-    items = await list_products(
+    return await _list_page(
         db,
-        page,
-        page_size,
-        sort_by,
-        sort_dir,
-        search,
-        guild_id,
-        min_price,
-        max_price,
-        city,
-        brand,
-        boosted,
-        synonyms,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_dir=sort_dir,
+        search=search,
+        guild_id=guild_id,
+        min_price=min_price,
+        max_price=max_price,
+        city=city,
+        brand=brand,
+        apply_boosts=boosted,
+        synonyms=synonyms,
+        cursor=cursor,
+        status_in=("approved",),
     )
-    # filter only approved for public
-    return [p for p in items if getattr(p, "status", "approved") == "approved"]
 
 
 # -----------------------------
 # Discovery sections placeholders
 # -----------------------------
+# Identical for every caller, so the serialized JSON is shared through Redis
+SECTIONS_CACHE_TTL = 30
+_SECTION_SORT = {"recommended": "id", "trending": "id", "new": "created_at"}
+
+def _section_cache_key(section: str) -> str:
+    return f"products:sections:{section}"
+
+async def _section_response(db: AsyncSession, section: str) -> Response:
+    """Cached section body; Redis being unavailable only costs the cache"""
+    key = _section_cache_key(section)
+    try:
+        redis = await get_redis(max_retries=1, delay=0)
+        body = await redis.get(key)
+    except Exception:
+        redis, body = None, None
+    if body is None:
+        items = await list_section_products(db, _SECTION_SORT[section])
+        body = orjson.dumps(_product_dicts(items))
+        if redis is not None:
+            try:
+                await redis.setex(key, SECTIONS_CACHE_TTL, body)
+            except Exception as e:
+                logger.warning("Could not cache product section %s: %s", section, e)
+    return Response(content=body, media_type="application/json")
+
+async def _invalidate_sections() -> None:
+    """Drop the cached sections after a product write (best-effort)"""
+    try:
+        redis = await get_redis(max_retries=1, delay=0)
+        await redis.delete(*(_section_cache_key(section) for section in _SECTION_SORT))
+    except Exception as e:
+        logger.warning("Could not invalidate product sections: %s", e)
+
+
 @router.get("/sections/recommended", response_model=List[ProductOut], operation_id="product_recommended")
-async def recommended_products(db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session)):
-    return await list_products(db, page=1, page_size=10, sort_by="id", sort_dir="desc")
+async def recommended_products(db: AsyncSession = Depends(get_session)):
+    return await _section_response(db, "recommended")
 
 
 @router.get("/sections/trending", response_model=List[ProductOut], operation_id="product_trending")
-async def trending_products(db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session)):
-    return await list_products(db, page=1, page_size=10, sort_by="id", sort_dir="desc")
+async def trending_products(db: AsyncSession = Depends(get_session)):
+    return await _section_response(db, "trending")
 
 
 @router.get("/sections/new", response_model=List[ProductOut], operation_id="product_new")
-async def new_products(db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session)):
-    return await list_products(db, page=1, page_size=10, sort_by="created_at", sort_dir="desc")
+async def new_products(db: AsyncSession = Depends(get_session)):
+    return await _section_response(db, "new")
 
 # -----------------------------
 # Create Product
@@ -81,17 +150,16 @@ async def new_products(db: AsyncSession = Depends(__import__("app.db.session", f
 @router.post("/", response_model=ProductOut, operation_id="product_create")
 async def create_product_endpoint(
     product: ProductCreate,
+    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    db: AsyncSession = Depends(get_session),
     _: None = Depends(enforce_product_limit), # ✅ enforce product limit
 ) -> ProductOut:
     """Create a new product linked to the current user (seller)."""
     created = await create_product(db, product, user.id)
-    # trigger async search index sync (best-effort)
-    try:
-        await search_sync_products(db)
-    except Exception:
-        pass
+    await _invalidate_sections()
+    # reindex just this product after the response is sent (best-effort)
+    background_tasks.add_task(search_sync_product, created.id)
     return created
 
 # -----------------------------
@@ -100,7 +168,7 @@ async def create_product_endpoint(
 @router.get("/{product_id}", response_model=ProductOut, operation_id="product_get_by_id")
 async def get_product_endpoint(
     product_id: int,
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    db: AsyncSession = Depends(get_session),
 ) -> ProductOut:
     """Fetch a product by its ID."""
     db_product = await get_product(db, product_id)
@@ -115,8 +183,9 @@ async def get_product_endpoint(
 async def update_product_endpoint(
     product_id: int,
     product_data: ProductUpdate,
+    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    db: AsyncSession = Depends(get_session),
 ) -> ProductOut:
     """Update an existing product (only owner can update)."""
     db_product = await update_product(db, product_id, product_data, user.id)
@@ -125,11 +194,9 @@ async def update_product_endpoint(
             status_code=404,
             detail="Product not found or permission denied",
         )
-    # trigger async search index sync (best-effort)
-    try:
-        await search_sync_products(db)
-    except Exception:
-        pass
+    await _invalidate_sections()
+    # reindex just this product after the response is sent (best-effort)
+    background_tasks.add_task(search_sync_product, db_product.id)
     return db_product
 
 # -----------------------------
@@ -138,8 +205,9 @@ async def update_product_endpoint(
 @router.delete("/{product_id}", response_model=dict, operation_id="product_delete")
 async def delete_product_endpoint(
     product_id: int,
+    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    db: AsyncSession = Depends(get_session),
 ) -> dict:
     """Delete an existing product (only owner can delete)."""
     success = await delete_product(db, product_id, user.id)
@@ -148,11 +216,9 @@ async def delete_product_endpoint(
             status_code=404,
             detail="Product not found or permission denied",
         )
-    # trigger async search index sync (best-effort)
-    try:
-        await search_sync_products(db)
-    except Exception:
-        pass
+    await _invalidate_sections()
+    # reindex just this product after the response is sent (best-effort)
+    background_tasks.add_task(search_sync_product, product_id)
     return {"detail": "Product deleted successfully"}
 
 # -----------------------------
@@ -160,9 +226,9 @@ async def delete_product_endpoint(
 # -----------------------------
 @router.get("/", response_model=List[ProductOut], operation_id="product_list")
 async def list_products_endpoint(
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, le=MAX_OFFSET_PAGE, description="Page number (deprecated for deep pages: use cursor)"),
     page_size: int = Query(10, ge=1, le=100, description="Results per page"),
-    sort_by: str = Query("id", description="Field to sort by"),
+    sort_by: ProductSort = Query(ProductSort.id, description="Field to sort by"),
     sort_dir: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
     search: Optional[str] = Query(None, description="Search term for product name"),
     guild_id: Optional[int] = Query(None, description="Filter by guild id"),
@@ -172,25 +238,27 @@ async def list_products_endpoint(
     brand: Optional[str] = Query(None, description="Filter by brand"),
     boosted: bool = Query(False, description="Apply subscription-based boosts"),
     synonyms: Optional[List[str]] = Query(None, description="Synonyms for search"),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_session),
 ) -> List[ProductOut]:
     """List all products with pagination, sorting, and filters."""
-    return await list_products(
+    return await _list_page(
         db,
-        page,
-        page_size,
-        sort_by,
-        sort_dir,
-        search,
-        guild_id,
-        min_price,
-        max_price,
-        city,
-        brand,
-        boosted,
-        synonyms,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by,
+        sort_dir=sort_dir,
+        search=search,
+        guild_id=guild_id,
+        min_price=min_price,
+        max_price=max_price,
+        city=city,
+        brand=brand,
+        apply_boosts=boosted,
+        synonyms=synonyms,
+        cursor=cursor,
     )
 
 
 # Apply OpenAPI documentation enhancements
-enhance_endpoint_docs(router, product_docs)
\ No newline at end of file
+enhance_endpoint_docs(router, get_product_docs())
\ No newline at end of file
@@ -1,6 +1,13 @@
 from pydantic import BaseModel
 from typing import Optional, Dict
 from datetime import datetime
+import enum
+
+class ProductSort(str, enum.Enum):
+    """Sortable listing columns (each has a supporting index)"""
+    id = "id"
+    created_at = "created_at"
+    price = "price"
 
 class ProductCreate(BaseModel):
     seller_id: int
@@ -27,3 +34,6 @@ class ProductOut(ProductCreate):
     id: int
     created_at: datetime
     updated_at: datetime
+
+    # Response side: read straight from ORM rows, immutable, tolerant of extra attributes
+    model_config = {"from_attributes": True, "frozen": True, "extra": "ignore"}
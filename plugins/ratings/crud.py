@@ -1,30 +1,72 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from .models import Rating
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from .models import Rating, UserReputation
 from .schemas import RatingCreate
-from sqlalchemy import func, select
+
+
+def _reputation_upsert(user_id: int, score: float):
+    """Add one rating's score to the ratee's running sum and count"""
+    stmt = pg_insert(UserReputation).values(user_id=user_id, score_sum=score, ratings_count=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserReputation.user_id],
+        set_={
+            "score_sum": UserReputation.score_sum + stmt.excluded.score_sum,
+            "ratings_count": UserReputation.ratings_count + 1,
+        }
+    )
 
 
 async def create_rating(db: AsyncSession, rater_id: int, data: RatingCreate) -> Rating:
-    rating = Rating(rater_id=rater_id, **data.dict())
+    rating = Rating(
+        rater_id=rater_id,
+        order_id=data.order_id,
+        ratee_id=data.ratee_id,
+        quality=data.quality,
+        timeliness=data.timeliness,
+        communication=data.communication,
+        reliability=data.reliability,
+        comment=data.comment,
+    )
     db.add(rating)
-    await db.commit()
-    await db.refresh(rating)
+    # Mean of the per-rating scores equals the mean of the four per-field averages
+    score = (data.quality + data.timeliness + data.communication + data.reliability) / 4.0
+    await db.execute(_reputation_upsert(data.ratee_id, score))
+    await db.flush()
     return rating
 
 
+def ratings_for_user_query(user_id: int):
+    return select(Rating).where(Rating.ratee_id == user_id)
+
+
 async def list_ratings_for_user(db: AsyncSession, user_id: int) -> list[Rating]:
-    result = await db.execute(select(Rating).where(Rating.ratee_id == user_id))
+    result = await db.execute(ratings_for_user_query(user_id))
     return result.scalars().all()
 
 
+# Reputation is read from the user_reputation rollup (one row per ratee)
+# instead of aggregating ratings on every lookup
 async def get_reputation_score(db: AsyncSession, user_id: int) -> float:
-    row = await db.execute(
-        select(
-            (func.avg(Rating.quality) + func.avg(Rating.timeliness) + func.avg(Rating.communication) + func.avg(Rating.reliability)) / 4.0
-        ).where(Rating.ratee_id == user_id)
-    )
+    row = await db.execute(select(UserReputation.avg_score).where(UserReputation.user_id == user_id))
     score = row.scalar()
     return float(score or 0.0)
 
 
+def reputation_scores_query(ratee_ids=None):
+    """SELECT ratee_id, score per rated user, for joining into other queries"""
+    query = select(UserReputation.user_id.label("ratee_id"), UserReputation.avg_score.label("score"))
+    if ratee_ids is not None:
+        query = query.where(UserReputation.user_id.in_(ratee_ids))
+    return query
+
+
+async def get_reputation_scores_bulk(db: AsyncSession, user_ids) -> dict[int, float]:
+    """Reputation for many users in one user_reputation lookup; users without ratings are absent"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    rows = await db.execute(reputation_scores_query(user_ids))
+    return {ratee_id: float(score or 0.0) for ratee_id, score in rows}
+
+
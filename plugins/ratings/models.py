@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, func
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, func, type_coerce
+from sqlalchemy.orm import column_property, declarative_base, relationship
 
 
 from app.db.base import Base
@@ -11,7 +11,7 @@ class Rating(Base):
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
     rater_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    ratee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    ratee_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
     quality = Column(Float, nullable=False)
     timeliness = Column(Float, nullable=False)
@@ -23,12 +23,22 @@ class Rating(Base):
     order = relationship("Order")
     rater = relationship("User", foreign_keys=[rater_id])
     ratee = relationship("User", foreign_keys=[ratee_id])
-    seller = relationship("plugins.seller.models.Seller", back_populates="ratings")
-    seller = relationship("Seller", back_populates="ratings")  # <- add this
-
+    seller = relationship("Seller", back_populates="ratings")
 
+    __mapper_args__ = {"eager_defaults": True}
 
 
+class UserReputation(Base):
+    """Running reputation per ratee, maintained by create_rating; ratings stay the source.
 
+    Stores the exact sum and count; the average is computed on read, so it does
+    not accumulate rounding error rating after rating.
+    """
+    __tablename__ = "user_reputation"
 
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    score_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    ratings_count = Column(Integer, nullable=False, default=0, server_default="0")
 
+    # Rows are only created by a rating, so ratings_count is never 0
+    avg_score = column_property(score_sum / type_coerce(ratings_count, Float))
@@ -1,27 +1,42 @@
+from typing import List
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.db import get_session
+from app.core.db import get_transaction
+from app.core.deps import json_body, json_body_openapi
+from app.core.streaming import json_array, stream_rows
 from plugins.user.security import get_current_user
 from plugins.user.models import User
 from .schemas import RatingCreate, RatingOut
 from . import crud
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Ratings come from our own database: construct without re-validation
+_RATING_LIST = TypeAdapter(List[RatingOut])
 
 
-@router.post("/", response_model=RatingOut)
+@router.post("/", response_model=RatingOut, openapi_extra=json_body_openapi(RatingCreate))
 async def create_rating_endpoint(
-    payload: RatingCreate,
+    payload: RatingCreate = Depends(json_body(RatingCreate)),
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session),
+    db: AsyncSession = Depends(get_transaction),
 ):
     return await crud.create_rating(db, rater_id=user.id, data=payload)
 
 
 @router.get("/user/{user_id}", response_model=list[RatingOut])
-async def list_ratings_for_user_endpoint(user_id: int, db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
-    return await crud.list_ratings_for_user(db, user_id)
+async def list_ratings_for_user_endpoint(user_id: int):
+    def render(ratings) -> bytes:
+        return _RATING_LIST.dump_json([
+            RatingOut.model_construct(**{field: getattr(r, field) for field in RatingOut.model_fields})
+            for r in ratings
+        ])
+    chunks = stream_rows(crud.ratings_for_user_query(user_id))
+    return StreamingResponse(json_array(chunks, render), media_type="application/json")
 
 
 
@@ -18,6 +18,8 @@ class RatingOut(RatingCreate):
     rater_id: int
     created_at: datetime
 
+    model_config = {"from_attributes": True, "frozen": True, "extra": "ignore"}
+
 
 
 
@@ -1,30 +1,36 @@
 # plugins/reports/crud.py
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 from .models import Report, ReportData
 from .schemas import ReportCreate
 from typing import List
 
 # Create a report
 async def create_report(db: AsyncSession, report_in: ReportCreate) -> Report:
-    report = Report(name=report_in.name, type=report_in.type)
+    # Data rows ride on the relationship: the unit of work inserts the report,
+    # then all of its rows in one batched INSERT, within a single commit
+    report = Report(
+        name=report_in.name,
+        type=report_in.type,
+        data=[ReportData(key=key, value=value) for key, value in (report_in.data or {}).items()],
+    )
     db.add(report)
+    # The caller's transaction commits. id and created_at are set by the flush
+    # (no server defaults) and report.data is in memory, so no refresh is needed
     await db.flush()
-
-    # Add report data
-    for key, value in (report_in.data or {}).items():
-        db.add(ReportData(report_id=report.id, key=key, value=value))
-
-    await db.commit()
-    await db.refresh(report)
     return report
 
 # Get report by ID
 async def get_report(db: AsyncSession, report_id: int) -> Report | None:
-    result = await db.execute(select(Report).where(Report.id == report_id))
+    result = await db.execute(select(Report).options(selectinload(Report.data)).where(Report.id == report_id))
     return result.scalars().first()
 
 # List all reports
+def reports_query():
+    # data is rendered for every report: load it in one extra IN query (per chunk when streamed)
+    return select(Report).options(selectinload(Report.data))
+
 async def list_reports(db: AsyncSession) -> List[Report]:
-    result = await db.execute(select(Report))
+    result = await db.execute(reports_query())
     return result.scalars().all()
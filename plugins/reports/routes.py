@@ -1,29 +1,57 @@
 # plugins/reports/routes.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from pydantic import TypeAdapter
 
-from app.core.db import get_session
-from .crud import create_report, get_report, list_reports
-from .schemas import ReportCreate, ReportOut, ReportListOut
+from app.core.db import get_session, get_transaction
+from app.core.deps import json_body, json_body_openapi
+from app.core.streaming import json_array, stream_rows
+from .crud import create_report, get_report, reports_query
+from .schemas import ReportCreate, ReportDataOut, ReportOut, ReportListOut
 
-router = APIRouter(prefix="/reports", tags=["Reports"])
+router = APIRouter(prefix="/reports", tags=["Reports"], default_response_class=ORJSONResponse)
 
 # Create report
-@router.post("/", response_model=ReportOut)
-async def create_new_report(report_in: ReportCreate, db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
+@router.post("/", response_model=ReportOut, openapi_extra=json_body_openapi(ReportCreate))
+async def create_new_report(report_in: ReportCreate = Depends(json_body(ReportCreate)), db: AsyncSession = Depends(get_transaction)):
     return await create_report(db, report_in)
 
 # Get single report
 @router.get("/{report_id}", response_model=ReportOut)
-async def get_single_report(report_id: int, db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
+async def get_single_report(report_id: int, db: AsyncSession = Depends(get_session)):
     report = await get_report(db, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
 
+_REPORT_LIST = TypeAdapter(List[ReportOut])
+
+def _render_reports(reports) -> bytes:
+    # Trusted DB rows: construct the models without re-validating them
+    return _REPORT_LIST.dump_json([
+        ReportOut.model_construct(
+            id=r.id, name=r.name, type=r.type, created_at=r.created_at,
+            data=[ReportDataOut.model_construct(key=d.key, value=d.value) for d in r.data],
+        )
+        for r in reports
+    ])
+
+async def _report_list_body():
+    """ReportListOut as a stream: the items array first, then the total seen"""
+    total = 0
+    async def counted():
+        nonlocal total
+        async for reports in stream_rows(reports_query()):
+            total += len(reports)
+            yield reports
+    yield b'{"items":'
+    async for part in json_array(counted(), _render_reports):
+        yield part
+    yield b',"total":%d}' % total
+
 # List all reports
 @router.get("/", response_model=ReportListOut)
-async def get_all_reports(db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
-    reports = await list_reports(db)
-    return {"items": reports, "total": len(reports)}
+async def get_all_reports():
+    return StreamingResponse(_report_list_body(), media_type="application/json")
@@ -7,7 +7,7 @@ class ReportDataOut(BaseModel):
     key: str
     value: float
 
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True}
 
 class ReportOut(BaseModel):
     id: int
@@ -16,7 +16,7 @@ class ReportOut(BaseModel):
     created_at: datetime
     data: List[ReportDataOut] = []
 
-    model_config = {"from_attributes": True}
+    model_config = {"from_attributes": True, "frozen": True}
 
 class ReportCreate(BaseModel):
     name: str
@@ -1,31 +1,69 @@
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
+from plugins.ratings.crud import reputation_scores_query
 from .models import RFQ, Quote
 from .schemas import RFQCreate, QuoteCreate
 
 
 async def create_rfq(db: AsyncSession, buyer_id: int, data: RFQCreate) -> RFQ:
-    rfq = RFQ(buyer_id=buyer_id, **data.dict())
+    rfq = RFQ(
+        buyer_id=buyer_id,
+        title=data.title,
+        specifications=data.specifications,
+        quantity=data.quantity,
+        target_price=data.target_price,
+        delivery=data.delivery,
+        expiry=data.expiry,
+        visibility=data.visibility,
+        invited_seller_ids=data.invited_seller_ids,
+    )
     db.add(rfq)
-    await db.commit()
-    await db.refresh(rfq)
+    await db.flush()
     return rfq
 
 
-async def list_rfqs(db: AsyncSession) -> list[RFQ]:
-    result = await db.execute(select(RFQ))
+def rfqs_query(viewer_id: int | None = None):
+    """All RFQs, or with ``viewer_id`` only those the user may see: public ones
+    (no visibility counts as public), their own, and private ones they are invited to"""
+    query = select(RFQ)
+    if viewer_id is not None:
+        query = query.where(or_(
+            RFQ.visibility.is_(None),
+            RFQ.visibility == "public",
+            RFQ.buyer_id == viewer_id,
+            RFQ.invited_seller_ids.contains([viewer_id]),
+        ))
+    return query
+
+
+async def list_rfqs(db: AsyncSession, viewer_id: int | None = None) -> list[RFQ]:
+    result = await db.execute(rfqs_query(viewer_id))
     return result.scalars().all()
 
 
+async def count_rfqs_since(db: AsyncSession, buyer_id: int, since: datetime) -> int:
+    """RFQs a buyer created since ``since`` (range scan on ix_rfqs_buyer_created)"""
+    result = await db.execute(
+        select(func.count()).select_from(RFQ).where(RFQ.buyer_id == buyer_id, RFQ.created_at >= since)
+    )
+    return result.scalar_one()
+
+
 async def get_rfq(db: AsyncSession, rfq_id: int) -> RFQ | None:
     return await db.get(RFQ, rfq_id)
 
 
 async def create_quote(db: AsyncSession, seller_id: int, data: QuoteCreate) -> Quote:
-    quote = Quote(seller_id=seller_id, **data.dict())
+    quote = Quote(
+        seller_id=seller_id,
+        rfq_id=data.rfq_id,
+        price=data.price,
+        terms=data.terms,
+        attachments=data.attachments,
+    )
     db.add(quote)
-    await db.commit()
-    await db.refresh(quote)
+    await db.flush()
     return quote
 
 
@@ -34,6 +72,19 @@ async def list_quotes_for_rfq(db: AsyncSession, rfq_id: int) -> list[Quote]:
     return result.scalars().all()
 
 
+async def list_quotes_for_rfq_ranked(db: AsyncSession, rfq_id: int) -> list[Quote]:
+    """Quotes for an RFQ, best seller reputation first (unrated sellers score 0)"""
+    bidders = select(Quote.seller_id).where(Quote.rfq_id == rfq_id)
+    scores = reputation_scores_query(bidders).cte("scores")
+    result = await db.execute(
+        select(Quote)
+        .outerjoin(scores, scores.c.ratee_id == Quote.seller_id)
+        .where(Quote.rfq_id == rfq_id)
+        .order_by(func.coalesce(scores.c.score, 0).desc(), Quote.id)
+    )
+    return result.scalars().all()
+
+
 
 
 
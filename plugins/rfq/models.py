@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, func, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, func, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base, relationship
 
 
@@ -18,18 +19,31 @@ class RFQ(Base):
     expiry = Column(DateTime(timezone=True), nullable=True)
     attachments = Column(JSON, nullable=True)
     visibility = Column(String, nullable=True)  # public, private
-    invited_seller_ids = Column(JSON, nullable=True)
+    invited_seller_ids = Column(JSONB, nullable=True)  # list of invited user ids
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     buyer = relationship("User")
 
+    # created_at/updated_at come back with INSERT ... RETURNING, no refresh needed
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Per-buyer recent-RFQ throttle in create_rfq_endpoint
+        Index("ix_rfqs_buyer_created", "buyer_id", "created_at"),
+        # invited_seller_ids @> [viewer] in list_rfqs
+        Index(
+            "ix_rfqs_invited_seller_ids", "invited_seller_ids",
+            postgresql_using="gin", postgresql_ops={"invited_seller_ids": "jsonb_path_ops"}
+        ),
+    )
+
 
 class Quote(Base):
     __tablename__ = "quotes"
 
     id = Column(Integer, primary_key=True, index=True)
-    rfq_id = Column(Integer, ForeignKey("rfqs.id"), nullable=False)
+    rfq_id = Column(Integer, ForeignKey("rfqs.id"), nullable=False, index=True)
     seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     price = Column(Float, nullable=False)
     terms = Column(String, nullable=True)
@@ -41,6 +55,8 @@ class Quote(Base):
     rfq = relationship("RFQ")
     seller = relationship("User")
 
+    __mapper_args__ = {"eager_defaults": True}
+
 
 
 
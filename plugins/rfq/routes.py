@@ -1,59 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.db import get_session
+from app.core.db import get_session, get_transaction
+from app.core.deps import json_body, json_body_openapi
+from app.core.streaming import json_array, stream_rows
 from plugins.user.security import get_current_user
 from plugins.user.models import User
 from .schemas import RFQCreate, RFQOut, QuoteCreate, QuoteOut
 from . import crud
 from .dependencies import enforce_rfq_limit
-from plugins.ratings.crud import get_reputation_score
+from plugins.ratings.crud import get_reputation_scores_bulk
 from sqlalchemy import select
 from plugins.seller.models import Seller
 # AuthUser import removed as User is now imported from plugins.user.models
 from typing import List, Optional
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
+# List rows come from our own database: build the response models with
+# model_construct (no re-validation) and serialize them straight to JSON
+_RFQ_LIST = TypeAdapter(List[RFQOut])
+_QUOTE_LIST = TypeAdapter(List[QuoteOut])
 
-@router.post("/rfqs", response_model=RFQOut)
+
+def _construct(model, row):
+    return model.model_construct(**{field: getattr(row, field) for field in model.model_fields})
+
+
+@router.post("/rfqs", response_model=RFQOut, openapi_extra=json_body_openapi(RFQCreate))
 async def create_rfq_endpoint(
-    payload: RFQCreate,
+    payload: RFQCreate = Depends(json_body(RFQCreate)),
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session),
+    db: AsyncSession = Depends(get_transaction),
 ):
     await enforce_rfq_limit(user.id, db)
     # Spam throttle: simple rate limit based on recent RFQs
-    from datetime import datetime, timedelta
-    recent = await crud.list_rfqs(db)
-    recent = [r for r in recent if r.buyer_id == user.id and getattr(r, 'created_at', datetime.min) >= datetime.utcnow() - timedelta(minutes=5)]
-    if len(recent) >= 5:
+    from datetime import datetime, timedelta, timezone
+    recent = await crud.count_rfqs_since(db, user.id, datetime.now(timezone.utc) - timedelta(minutes=5))
+    if recent >= 5:
         raise HTTPException(status_code=429, detail="Too many RFQs. Please wait a few minutes.")
     # Visibility handling: store invited_seller_ids/visibility
     return await crud.create_rfq(db, buyer_id=user.id, data=payload)
 
 
 @router.get("/rfqs", response_model=list[RFQOut])
-async def list_rfqs_endpoint(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
-    rfqs = await crud.list_rfqs(db)
-    visible: list = []
-    for r in rfqs:
-        vis = getattr(r, 'visibility', None) or 'public'
-        if vis == 'public':
-            visible.append(r)
-        else:
-            invited = set(getattr(r, 'invited_seller_ids', []) or [])
-            # If current user is buyer or invited seller (by user id), allow
-            if r.buyer_id == current_user.id or current_user.id in invited:
-                visible.append(r)
-    return visible
-
-
-@router.post("/quotes", response_model=QuoteOut)
+async def list_rfqs_endpoint(current_user: User = Depends(get_current_user)):
+    # Visibility is enforced in SQL: public, own, or invited (by user id)
+    chunks = stream_rows(crud.rfqs_query(viewer_id=current_user.id))
+    return StreamingResponse(
+        json_array(chunks, lambda rfqs: _RFQ_LIST.dump_json([_construct(RFQOut, r) for r in rfqs])),
+        media_type="application/json",
+    )
+
+
+@router.post("/quotes", response_model=QuoteOut, openapi_extra=json_body_openapi(QuoteCreate))
 async def create_quote_endpoint(
-    payload: QuoteCreate,
+    payload: QuoteCreate = Depends(json_body(QuoteCreate)),
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session),
+    db: AsyncSession = Depends(get_transaction),
 ):
     # Enforce private visibility: only invited sellers can quote
     rfq = await db.get(crud.RFQ, payload.rfq_id)  # type: ignore[attr-defined]
@@ -68,22 +74,17 @@ async def create_quote_endpoint(
 
 
 @router.get("/rfqs/{rfq_id}/quotes", response_model=list[QuoteOut])
-async def list_quotes_for_rfq_endpoint(rfq_id: int, db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session)):
-    quotes = await crud.list_quotes_for_rfq(db, rfq_id)
-    # sort by seller reputation desc
-    scored: list[tuple[float, any]] = []
-    for q in quotes:
-        score = await get_reputation_score(db, q.seller_id)
-        scored.append((score, q))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [q for _, q in scored]
+async def list_quotes_for_rfq_endpoint(rfq_id: int, db: AsyncSession = Depends(get_session)):
+    # sorted by seller reputation desc in SQL
+    quotes = await crud.list_quotes_for_rfq_ranked(db, rfq_id)
+    return Response(_QUOTE_LIST.dump_json([_construct(QuoteOut, q) for q in quotes]), media_type="application/json")
 
 
 @router.get("/rfqs/{rfq_id}/matches", response_model=list[dict])
 async def suggest_sellers_for_rfq(
     rfq_id: int,
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_session),
+    db: AsyncSession = Depends(get_session),
 ):
     """Suggest relevant sellers for an RFQ by simple heuristics:
     - Match on buyer's guild via products.seller join if available later (placeholder)
@@ -100,6 +101,14 @@ async def suggest_sellers_for_rfq(
     # Base seller list
     result = await db.execute(select(Seller))
     sellers: List[Seller] = result.scalars().all()
+    # Seller owners in one IN query, shared by scoring and the cards
+    owner_ids = {s.user_id for s in sellers}
+    owners: dict[int, User] = {}
+    if owner_ids:
+        owner_rows = await db.execute(select(User).where(User.id.in_(owner_ids)))
+        owners = {u.id: u for u in owner_rows.scalars()}
+    # Ratings are keyed by users.id (ratee_id), i.e. the seller's owner
+    reputations = await get_reputation_scores_bulk(db, owner_ids)
 
     # Score sellers
     scored: list[tuple[float, Seller]] = []
@@ -112,7 +121,7 @@ async def suggest_sellers_for_rfq(
         if getattr(s, "is_featured", False):
             score += 1.0
         # Business meta boosts
-        owner: Optional[AuthUser] = await db.get(AuthUser, s.user_id)
+        owner: Optional[User] = owners.get(s.user_id)
         if owner:
             if getattr(owner, "kyc_status", "") in ("business_verified", "otp_verified"):
                 score += 1.0
@@ -122,11 +131,7 @@ async def suggest_sellers_for_rfq(
             if title and (title in bn or title in ind):
                 score += 1.5
         # Reputation boost
-        try:
-            rep = await get_reputation_score(db, s.id)
-            score += float(rep or 0) / 100.0
-        except Exception:
-            pass
+        score += reputations.get(s.user_id, 0.0) / 100.0
         scored.append((score, s))
 
     scored.sort(key=lambda x: x[0], reverse=True)
@@ -134,12 +139,8 @@ async def suggest_sellers_for_rfq(
 
     cards = []
     for s in top:
-        owner: Optional[AuthUser] = await db.get(AuthUser, s.user_id)
-        rep = 0.0
-        try:
-            rep = float(await get_reputation_score(db, s.id) or 0)
-        except Exception:
-            rep = 0.0
+        owner: Optional[User] = owners.get(s.user_id)
+        rep = reputations.get(s.user_id, 0.0)
         cards.append({
             "seller_id": s.id,
             "name": s.name,
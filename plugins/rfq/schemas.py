@@ -20,6 +20,8 @@ class RFQOut(RFQCreate):
     created_at: datetime
     updated_at: datetime
 
+    model_config = {"from_attributes": True, "frozen": True, "extra": "ignore"}
+
 
 class QuoteCreate(BaseModel):
     rfq_id: int
@@ -35,6 +37,8 @@ class QuoteOut(QuoteCreate):
     created_at: datetime
     updated_at: datetime
 
+    model_config = {"from_attributes": True, "frozen": True, "extra": "ignore"}
+
 
 
 
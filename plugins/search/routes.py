@@ -22,10 +22,12 @@ def db_dep():
 
 
 # Exported helper for other plugins (e.g., products)
-async def sync_products(db):
-    # Placeholder: trigger reindexing of products
+def sync_product(product_id: int) -> None:
+    """Reindex one product in its own session; meant to run as a background task"""
+    from app.db.session import SyncSessionLocal
     try:
-        crud.reindex_entities(db, schemas.SearchIndexType.PRODUCT, None, False)
+        with SyncSessionLocal() as db:
+            crud.reindex_entities(db, schemas.SearchIndexType.PRODUCT, [product_id], False)
     except Exception:
         pass
 
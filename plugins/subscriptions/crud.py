@@ -4,6 +4,9 @@ from plugins.subscriptions.models import SubscriptionPlan, UserSubscription
 from plugins.subscriptions.schemas import SubscriptionPlanCreate, UserSubscriptionCreate
 from plugins.user.crud import get_user
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from cachetools import TTLCache
 
 async def create_subscription_plan(db: AsyncSession, plan: SubscriptionPlanCreate):
     db_plan = SubscriptionPlan(**plan.dict())
@@ -36,6 +39,7 @@ async def assign_user_subscription(db: AsyncSession, data: UserSubscriptionCreat
     db.add(db_sub)
     await db.commit()
     await db.refresh(db_sub)
+    invalidate_plan_limits(data.user_id)
     return db_sub
 
 async def list_user_subscriptions(db: AsyncSession, user_id: int):
@@ -61,3 +65,30 @@ async def check_plan_limits(user_id: int, db: AsyncSession) -> SubscriptionPlan
         return None
     plan = await db.get(SubscriptionPlan, sub.plan_id)
     return plan
+
+
+# Product/RFQ creation checks the plan on every request; plans rarely change, so
+# keep a detached snapshot per user for a minute. Users without an active plan
+# are not cached, so a new subscription is picked up immediately.
+PLAN_LIMITS_CACHE_TTL = 60
+_plan_limits_cache: TTLCache = TTLCache(maxsize=10_000, ttl=PLAN_LIMITS_CACHE_TTL)
+
+
+def invalidate_plan_limits(user_id: int | None = None) -> None:
+    """Drop one user's cached plan, or every user's (after a plan itself changes)"""
+    if user_id is None:
+        _plan_limits_cache.clear()
+    else:
+        _plan_limits_cache.pop(user_id, None)
+
+
+async def get_cached_plan_limits(user_id: int, db: AsyncSession) -> SimpleNamespace | None:
+    """check_plan_limits through a TTL cache; returns a plain snapshot of the plan's columns"""
+    limits = _plan_limits_cache.get(user_id)
+    if limits is None:
+        plan = await check_plan_limits(user_id, db)
+        if plan is None:
+            return None
+        limits = SimpleNamespace(**{c.key: getattr(plan, c.key) for c in SubscriptionPlan.__table__.columns})
+        _plan_limits_cache[user_id] = limits
+    return limits
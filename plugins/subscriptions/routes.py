@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.db import get_session
-from plugins.subscriptions.crud import create_subscription_plan, list_subscription_plans, assign_user_subscription, list_user_subscriptions
+from plugins.subscriptions.crud import create_subscription_plan, list_subscription_plans, assign_user_subscription, list_user_subscriptions, invalidate_plan_limits
 from plugins.subscriptions.schemas import SubscriptionPlanCreate, SubscriptionPlanOut, UserSubscriptionCreate, UserSubscriptionOut
 from pydantic import BaseModel
 from typing import Optional
@@ -50,6 +50,7 @@ async def patch_plan(plan_id: int, payload: SubscriptionPlanPatch, db: AsyncSess
         return plan
     await db.execute(update(SubscriptionPlan).where(SubscriptionPlan.id == plan_id).values(**values))
     await db.commit()
+    invalidate_plan_limits()
     plan = await db.get(SubscriptionPlan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
@@ -1,3 +1,4 @@
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,11 +22,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_session),
-) -> models.User:
-    """Return the authenticated user from a JWT access token."""
+def _token_user_id(token: str) -> int:
     payload = jwt.verify_token(token)
     if not payload:
         raise HTTPException(
@@ -33,8 +30,15 @@ async def get_current_user(
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return int(payload.get("sub"))
+
 
-    user_id = int(payload.get("sub"))
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_session),
+) -> models.User:
+    """Return the authenticated user from a JWT access token."""
+    user_id = _token_user_id(token)
     result = await db.execute(select(models.User).filter(models.User.id == user_id))
     user = result.scalars().first()
 
@@ -54,6 +58,44 @@ async def get_current_user(
     return user
 
 
+# Active users only, so a deactivation takes effect within this many seconds
+ACTIVE_USER_CACHE_TTL = 30
+_active_user_ids: TTLCache = TTLCache(maxsize=10_000, ttl=ACTIVE_USER_CACHE_TTL)
+
+
+async def get_current_user_id(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_session),
+) -> int:
+    """Return the authenticated user's id for routes that need nothing else.
+
+    Same checks as get_current_user, but only reads ``is_active`` and skips
+    even that while the id is in the short-lived active-user cache.
+    """
+    user_id = _token_user_id(token)
+    if user_id in _active_user_ids:
+        return user_id
+
+    result = await db.execute(select(models.User.is_active).filter(models.User.id == user_id))
+    is_active = result.scalar()
+
+    if is_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    _active_user_ids[user_id] = True
+    return user_id
+
+
 async def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
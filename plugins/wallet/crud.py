@@ -1,8 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update, and_
+from sqlalchemy import update, and_, bindparam
+from sqlalchemy.engine import Row
 from typing import List, Optional
 
+from cachetools import TTLCache
+
 from .models import Wallet, Transaction, CurrencyType, TransactionType
 from .schemas import WalletCreate, WalletUpdate, TransactionCreate, TransactionUpdate
 
@@ -37,6 +40,25 @@ async def get_user_wallet_by_currency(db: AsyncSession, user_id: int, currency:
     )
     return result.scalars().first()
 
+# Payment flows only need the id (deposit re-loads the row), and a wallet never
+# changes owner or currency, so positive lookups are safe to keep for a few seconds
+WALLET_ID_CACHE_TTL = 5
+_wallet_id_cache: TTLCache = TTLCache(maxsize=10_000, ttl=WALLET_ID_CACHE_TTL)
+
+_WALLET_ID_BY_USER_CURRENCY = select(Wallet.id).where(
+    and_(Wallet.user_id == bindparam("user_id"), Wallet.currency == bindparam("currency"))
+)
+
+async def get_user_wallet_id(db: AsyncSession, user_id: int, currency: str) -> Optional[int]:
+    key = (user_id, currency)
+    wallet_id = _wallet_id_cache.get(key)
+    if wallet_id is None:
+        result = await db.execute(_WALLET_ID_BY_USER_CURRENCY, {"user_id": user_id, "currency": currency})
+        wallet_id = result.scalars().first()
+        if wallet_id is not None:
+            _wallet_id_cache[key] = wallet_id
+    return wallet_id
+
 async def update_wallet(db: AsyncSession, wallet_id: int, wallet_data: WalletUpdate) -> Optional[Wallet]:
     await db.execute(
         update(Wallet)
@@ -64,9 +86,30 @@ async def get_transaction(db: AsyncSession, transaction_id: int) -> Optional[Tra
     result = await db.execute(select(Transaction).where(Transaction.id == transaction_id))
     return result.scalars().first()
 
-async def get_wallet_transactions(db: AsyncSession, wallet_id: int) -> List[Transaction]:
-    result = await db.execute(select(Transaction).where(Transaction.wallet_id == wallet_id))
-    return result.scalars().all()
+# Exactly the columns TransactionOut renders
+_TRANSACTION_LIST_COLUMNS = (
+    Transaction.id, Transaction.wallet_id, Transaction.amount, Transaction.transaction_type,
+    Transaction.reference, Transaction.description, Transaction.status,
+    Transaction.created_at, Transaction.updated_at
+)
+
+async def get_wallet_transactions(
+    db: AsyncSession,
+    wallet_id: int,
+    after_id: Optional[int] = None,
+    limit: int = 50
+) -> List[Row]:
+    """Newest-first page of a wallet's transactions.
+
+    Keyset pagination: pass the last id of the previous page as ``after_id``.
+    Returns plain column rows (attribute access, no ORM identity map) for
+    read-only listing.
+    """
+    query = select(*_TRANSACTION_LIST_COLUMNS).where(Transaction.wallet_id == wallet_id)
+    if after_id is not None:
+        query = query.where(Transaction.id < after_id)
+    result = await db.execute(query.order_by(Transaction.id.desc()).limit(limit))
+    return result.all()
 
 async def update_transaction(db: AsyncSession, transaction_id: int, transaction_data: TransactionUpdate) -> Optional[Transaction]:
     await db.execute(
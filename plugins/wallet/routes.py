@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from app.core.deps import get_current_user
 
@@ -126,6 +126,8 @@ async def update_wallet(
 @router.get("/{wallet_id}/transactions", response_model=List[TransactionOut])
 async def get_wallet_transactions(
     wallet_id: int,
+    after_id: Optional[int] = Query(None, description="Return transactions older than this id"),
+    limit: int = Query(50, ge=1, le=200),
     db: AsyncSession = Depends(lambda: __import__("importlib").import_module("app.db.session").get_db_sync),
     current_user: User = Depends(get_current_user)
 ):
@@ -143,7 +145,7 @@ async def get_wallet_transactions(
             detail="Not enough permissions"
         )
     
-    return await crud.get_wallet_transactions(db, wallet_id)
+    return await crud.get_wallet_transactions(db, wallet_id, after_id=after_id, limit=limit)
 
 @router.post("/deposit", response_model=TransactionOut)
 async def deposit_funds(
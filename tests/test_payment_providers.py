@@ -0,0 +1,118 @@
+import pytest
+
+from plugins.payments.iran_providers import ProviderPaymentRequest, create_payments_bulk
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_keeps_request_order():
+    requests = [
+        ProviderPaymentRequest("mellat", {"is_test_mode": True}, 1000, "IRR", "Top-up", f"ref_{i}")
+        for i in range(5)
+    ]
+    results = await create_payments_bulk(requests)
+    assert [r["ref_id"] for r in results] == [f"mellat_ref_{i}" for i in range(5)]
+    assert all(r["success"] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_zarinpal_reads_streamed_reply_through_injected_client():
+    import httpx
+    from plugins.payments.iran_providers import ZarinPalProvider
+
+    def handler(request):
+        return httpx.Response(200, json={"data": {"code": 100, "authority": "A123"}, "errors": []})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        provider = ZarinPalProvider({"merchant_id": "m", "is_test_mode": True})
+        provider._client = client
+        result = await provider.create_payment(1000, "IRR", "Top-up", "ref_1")
+    assert result["success"] is True
+    assert result["payment_url"] == "https://www.zarinpal.com/pg/StartPay/A123"
+
+
+@pytest.mark.asyncio
+async def test_zarinpal_error_reply_with_empty_data_list():
+    import httpx
+    from plugins.payments.iran_providers import ZarinPalProvider
+
+    def handler(request):
+        return httpx.Response(200, json={"data": [], "errors": {"code": -9, "message": "Validation error"}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        provider = ZarinPalProvider({"merchant_id": "m", "is_test_mode": True})
+        provider._client = client
+        result = await provider.verify_payment("A123", 1000)
+    assert result["success"] is False
+    assert result["error"] == "Validation error"
+
+
+def test_fees_use_integer_rials():
+    from plugins.payments.iran_providers import calculate_payment_fees
+
+    fees = calculate_payment_fees(123_457, "IDPay")
+    # 1.2% of 123457 is 1481.484 Rials, rounded down
+    assert fees == {
+        "amount": 123_457,
+        "fee_bps": 120,
+        "fee_percentage": 1.2,
+        "fee_amount": 1481,
+        "total_amount": 124_938,
+    }
+    with pytest.raises(ValueError):
+        calculate_payment_fees(1000, "stripe")
+
+
+@pytest.mark.asyncio
+async def test_providers_body_is_cached_and_valid_json(monkeypatch):
+    import orjson
+    import app.db.base  # noqa: F401  (model registry before importing routes)
+    from plugins.payments import routes as payments_routes
+
+    payments_routes._providers_cache.clear()
+    calls = []
+    real = payments_routes.get_available_providers
+
+    async def counting():
+        calls.append(1)
+        return await real()
+
+    monkeypatch.setattr(payments_routes, "get_available_providers", counting)
+    first = await payments_routes._providers_body()
+    second = await payments_routes._providers_body()
+    assert first is second and len(calls) == 1
+    assert orjson.loads(first)["zarinpal"]["supports_irr"] is True
+    payments_routes._providers_cache.clear()
+
+
+def test_payment_json_response_renders_decimal_and_enum_keys():
+    from decimal import Decimal
+
+    import orjson
+    import app.db.base  # noqa: F401
+    from plugins.payments.models import PaymentMethod
+    from plugins.payments.routes import PaymentJSONResponse
+
+    response = PaymentJSONResponse({"provider_statistics": {PaymentMethod.ZARINPAL: {"amount": Decimal("1500.50")}}})
+    assert orjson.loads(response.body) == {"provider_statistics": {"zarinpal": {"amount": 1500.5}}}
+
+
+def test_injected_client_gets_its_own_provider_instance():
+    import httpx
+
+    from plugins.payments.iran_providers import IranPaymentFactory
+
+    config = {"merchant_id": "m", "callback_url": "/cb"}
+    client = httpx.AsyncClient()
+    injected = IranPaymentFactory.create_provider("zarinpal", config, client)
+    assert injected.client is client
+    assert IranPaymentFactory.create_provider("zarinpal", config) is not injected
+    assert IranPaymentFactory.create_provider("zarinpal", config) is IranPaymentFactory.create_provider("ZarinPal", config)
+
+
+def test_configs_with_nested_values_reuse_the_cached_provider():
+    from plugins.payments.iran_providers import IranPaymentFactory
+
+    config = {"merchant_id": "m", "callback_url": "/cb", "extra": {"ips": ["1.2.3.4"]}}
+    first = IranPaymentFactory.create_provider("idpay", config)
+    assert IranPaymentFactory.create_provider("idpay", dict(config)) is first
+    assert first.config["extra"] == {"ips": ["1.2.3.4"]}
@@ -0,0 +1,41 @@
+import hashlib
+import hmac
+
+import pytest
+
+import plugins.payments.crud as payments_crud
+
+
+def test_verify_callback_signature_accepts_valid_hmac(monkeypatch):
+    monkeypatch.setitem(payments_crud.PROVIDER_SECRETS, "zarinpal", b"s3cret")
+    body = b'{"Status": "OK", "Authority": "A1"}'
+    signature = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert payments_crud.verify_callback_signature("zarinpal", body, signature) is True
+
+
+def test_verify_callback_signature_rejects_tampered_body(monkeypatch):
+    monkeypatch.setitem(payments_crud.PROVIDER_SECRETS, "zarinpal", b"s3cret")
+    signature = hmac.new(b"s3cret", b"original", hashlib.sha256).hexdigest()
+    assert payments_crud.verify_callback_signature("zarinpal", b"tampered", signature) is False
+
+
+def test_verify_callback_signature_rejects_unconfigured_provider(monkeypatch):
+    monkeypatch.setitem(payments_crud.PROVIDER_SECRETS, "idpay", b"")
+    assert payments_crud.verify_callback_signature("idpay", b"body", "deadbeef") is False
+
+
+@pytest.mark.asyncio
+async def test_unsigned_callback_rejected_once_secret_configured(monkeypatch):
+    monkeypatch.setitem(payments_crud.PROVIDER_SECRETS, "idpay", b"s3cret")
+    body = b'{"status": 100, "order_id": "ref_1", "track_id": "t1"}'
+    result = await payments_crud.process_payment_callback(None, "idpay", body, {})
+    assert result == {"success": False, "error": "Invalid signature"}
+
+
+def test_callback_event_id_prefers_provider_transaction_id():
+    assert payments_crud._callback_event_id(
+        {"transaction_id": "T-9", "reference_id": "A1", "status": "success"}
+    ) == "T-9"
+    assert payments_crud._callback_event_id(
+        {"transaction_id": None, "reference_id": "A1", "status": "failed"}
+    ) == "A1:failed"
@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+
+import plugins.payments.crud as payments_crud
+
+
+def test_enqueue_without_flusher_falls_back(monkeypatch):
+    monkeypatch.setattr(payments_crud, "_webhook_queue", None)
+    assert payments_crud.enqueue_payment_webhook("zarinpal", "payment_callback", {"a": 1}) is False
+
+
+@pytest.mark.asyncio
+async def test_drain_collects_buffered_rows_in_one_batch():
+    queue = asyncio.Queue()
+    for i in range(5):
+        queue.put_nowait({"provider_name": "idpay", "event_type": "payment_callback", "payload": {"i": i}})
+    rows = await payments_crud._drain_webhook_batch(queue)
+    assert [r["payload"]["i"] for r in rows] == [0, 1, 2, 3, 4]
+    assert queue.empty()
@@ -0,0 +1,25 @@
+from datetime import date
+
+from plugins.payments.crud import expired_webhook_partitions, webhook_partition_name
+
+
+def test_partition_name_is_year_month():
+    assert webhook_partition_name(date(2026, 3, 1)) == "payment_webhooks_p202603"
+
+
+def test_expired_partitions_respect_retention_window():
+    names = [
+        "payment_webhooks_default",
+        "payment_webhooks_p202512",
+        "payment_webhooks_p202604",
+        "payment_webhooks_p202605",
+        "payment_webhooks_p202610",
+    ]
+    # Six months back from October 2026 is April 2026, which is still kept
+    assert expired_webhook_partitions(names, date(2026, 10, 18), 6) == ["payment_webhooks_p202512"]
+    assert expired_webhook_partitions(names, date(2027, 1, 5), 1) == [
+        "payment_webhooks_p202512",
+        "payment_webhooks_p202604",
+        "payment_webhooks_p202605",
+        "payment_webhooks_p202610",
+    ]
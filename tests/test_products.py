@@ -120,4 +120,39 @@ async def test_list_products(client, auth_headers, db_session):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert isinstance(data, list)
-    assert len(data) == 1  # Should only return one product
\ No newline at end of file
+    assert len(data) == 1  # Should only return one product
+
+def test_search_tsquery_ors_synonyms_and_strips_operators():
+    from plugins.products.crud import search_tsquery
+
+    assert search_tsquery(["red shoes", "sneaker"]) == "(red:* & shoes:*) | (sneaker:*)"
+    assert search_tsquery(["a|b & !c"]) == "(a:* & b:* & c:*)"
+    assert search_tsquery(["%%"]) == ""
+
+
+def test_product_cursor_round_trips_created_at():
+    from datetime import datetime, timezone
+    from types import SimpleNamespace
+
+    from plugins.products.crud import _decode_product_cursor, encode_product_cursor
+
+    product = SimpleNamespace(id=7, created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+    cursor = encode_product_cursor(product, "created_at", "desc")
+    assert _decode_product_cursor(cursor, "created_at") == (product.created_at, 7)
+    with pytest.raises(ValueError):
+        _decode_product_cursor("not-a-cursor", "created_at")
+
+
+def test_product_dicts_project_product_out_fields():
+    from datetime import datetime, timezone
+
+    import app.db.base  # noqa: F401  (registers the mapped models first)
+    from plugins.products.models import Product
+    from plugins.products.routes import _product_dicts
+    from plugins.products.schemas import ProductOut
+
+    now = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    product = Product(id=1, seller_id=2, name="Lamp", price=9.5, stock=3, created_at=now, updated_at=now)
+    (row,) = _product_dicts([product])
+    assert set(row) == set(ProductOut.model_fields)
+    assert ProductOut.model_validate(row).name == "Lamp"